@@ -0,0 +1,230 @@
+import hashlib
+import orjson
+from datetime import datetime, timedelta
+from flask import Blueprint, Response, abort, request
+from models import Venue, Show, ShowHistory, Artist, db
+from cache import cache
+from export import json_default
+from queries import (
+    venue_areas,
+    artist_list,
+    show_page,
+    venue_detail,
+    artist_detail,
+    search_results,
+    show_search,
+    genre_browse
+  )
+from genres import canonical_genre, canonical_genres
+from availability import DEFAULT_DURATION, MAX_DURATION, availability
+from scheduling import MAX_SHOWS, booked_cache_keys, schedule_shows
+
+#----------------------------------------------------------------------------#
+# JSON API.
+#----------------------------------------------------------------------------#
+# Listing and detail responses carry a strong ETag built from the newest
+# updated_at (and row count) of the rows they are built from. That version is
+# one aggregate query, so a matching If-None-Match is answered with a 304
+# before the page data is queried at all. Paginated and search responses
+# are tagged by a hash of their body instead.
+
+api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+
+def dumps(data):
+    return orjson.dumps(data, default=json_default)
+
+
+def make_etag(*parts):
+    return hashlib.sha1(repr((request.full_path,) + parts).encode('utf-8')).hexdigest()
+
+
+def json_response(data, etag=None):
+    body = dumps(data)
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag or hashlib.sha1(body).hexdigest())
+    return response.make_conditional(request)
+
+
+def conditional(version, build):
+    etag = make_etag(*version)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    data = build()
+    if data is None:
+        abort(404)
+    return json_response(data, etag)
+
+
+def table_version(model):
+    return db.session.query(db.func.max(model.updated_at), db.func.count(model.id)).one()
+
+
+def detail_version(model, other, column, other_column, ref_id):
+    # The record itself, plus the other side of every show listed on its page,
+    # live or archived, and how many of each there are.
+    live, archived = Show.__table__, ShowHistory.__table__
+    listed = db.union_all(
+        db.select(live.c[other_column].label('other_id')).where(live.c[column] == ref_id),
+        db.select(archived.c[other_column]).where(archived.c[column] == ref_id)
+    ).subquery()
+    version = db.session.query(
+        model.updated_at,
+        db.select(db.func.max(other.updated_at)).select_from(other).join(
+            listed, listed.c.other_id == other.id).scalar_subquery(),
+        db.select(db.func.count()).select_from(live).where(live.c[column] == ref_id).scalar_subquery(),
+        db.select(db.func.count()).select_from(archived).where(archived.c[column] == ref_id).scalar_subquery()
+    ).filter(model.id == ref_id).first()
+    if version is None:
+        abort(404)
+    return version
+
+
+def browse(model):
+    # ?genre= may repeat; results carry every requested genre.
+    genres = [canonical_genre(value) for value in request.args.getlist('genre')]
+    if None in genres:
+        abort(400, 'unknown genre')
+    limit = min(max(request.args.get('limit', 30, type=int), 1), 100)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    return json_response(genre_browse(model, canonical_genres(genres), limit, offset))
+
+
+def parse_time(value):
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        abort(400, f'expected an ISO 8601 time, got {value!r}')
+
+
+def availability_response(model, ref_id):
+    # ?from= and ?to= (ISO times, default the next 7 days, at most 92 days
+    # apart) and ?duration= minutes the free slots must fit.
+    if db.session.query(model.id).filter(model.id == ref_id).first() is None:
+        abort(404)
+    start = parse_time(request.args['from']) if 'from' in request.args else datetime.now()
+    end = parse_time(request.args['to']) if 'to' in request.args else start + timedelta(days=7)
+    if not start < end <= start + timedelta(days=92):
+        abort(400, 'the window must be positive and at most 92 days long')
+    minutes = min(max(request.args.get('duration', DEFAULT_DURATION, type=int), 15), MAX_DURATION)
+    return json_response(availability(model, ref_id, start, end, minutes))
+
+
+#  Venues
+#  ----------------------------------------------------------------
+
+@api.route('/venues')
+def venues():
+    return conditional(table_version(Venue), lambda: cache.get_or_set('venues', venue_areas))
+
+
+@api.route('/venues/<int:venue_id>')
+def show_venue(venue_id):
+    version = detail_version(Venue, Artist, 'venue_id', 'artist_id', venue_id)
+    return conditional(version, lambda: cache.get_or_set(
+        f'venue:{venue_id}', lambda: venue_detail(venue_id)))
+
+
+@api.route('/venues/browse')
+def browse_venues():
+    return browse(Venue)
+
+
+@api.route('/venues/<int:venue_id>/availability')
+def venue_availability(venue_id):
+    return availability_response(Venue, venue_id)
+
+
+@api.route('/venues/search')
+def search_venues():
+    return json_response(search_results(Venue, request.args.get('q', '')))
+
+
+#  Artists
+#  ----------------------------------------------------------------
+
+@api.route('/artists')
+def artists():
+    return conditional(table_version(Artist), lambda: cache.get_or_set('artists', artist_list))
+
+
+@api.route('/artists/<int:artist_id>')
+def show_artist(artist_id):
+    version = detail_version(Artist, Venue, 'artist_id', 'venue_id', artist_id)
+    return conditional(version, lambda: cache.get_or_set(
+        f'artist:{artist_id}', lambda: artist_detail(artist_id)))
+
+
+@api.route('/artists/browse')
+def browse_artists():
+    return browse(Artist)
+
+
+@api.route('/artists/<int:artist_id>/availability')
+def artist_availability(artist_id):
+    return availability_response(Artist, artist_id)
+
+
+@api.route('/artists/search')
+def search_artists():
+    return json_response(search_results(Artist, request.args.get('q', '')))
+
+
+#  Shows
+#  ----------------------------------------------------------------
+
+@api.route('/shows')
+def shows():
+    limit = min(max(request.args.get('limit', 30, type=int), 1), 100)
+    try:
+        data, next_cursor = show_page(request.args.get('after'), limit)
+    except ValueError:
+        abort(400)
+    return json_response({'shows': data, 'next_cursor': next_cursor})
+
+
+@api.route('/shows/search')
+def search_show():
+    try:
+        data = show_search(request.args.get('filter_by', 'venue'), request.args.get('q', ''))
+    except ValueError:
+        abort(400)
+    return json_response(data)
+
+
+@api.route('/shows/bulk', methods=['POST'])
+def schedule_show_list():
+    # Body: a list of {artist_id, venue_id, start_time[, duration]}, or
+    # {"shows": [...]}. 201 if every show was booked, 200 if some were, 422
+    # if none; `errors` gives the failed rows, numbered from 1.
+    rows = request.get_json(silent=True)
+    if isinstance(rows, dict):
+        rows = rows.get('shows')
+    if not isinstance(rows, list) or not rows:
+        abort(400, 'expected a JSON list of shows')
+    if len(rows) > MAX_SHOWS:
+        abort(400, f'at most {MAX_SHOWS} shows per request')
+    booked, errors = schedule_shows(rows)
+    cache.delete(*booked_cache_keys(booked))
+    data = {
+        'created': [{
+            'row': row_number,
+            'id': values['id'],
+            'artist_id': values['artist_id'],
+            'venue_id': values['venue_id'],
+            'start_time': values['created_time'],
+            'duration_minutes': values['duration_minutes']
+        } for row_number, values in booked],
+        'errors': [{'row': row_number, 'error': error} for row_number, error in errors]
+    }
+    status = 201 if not errors else 200 if booked else 422
+    return Response(dumps(data), status=status, mimetype='application/json')
+
+
+@api.errorhandler(400)
+@api.errorhandler(404)
+def api_error(error):
+    return Response(dumps({'error': error.description}), status=error.code,
+                    mimetype='application/json')
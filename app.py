@@ -1,100 +1,180 @@
 #----------------------------------------------------------------------------#
 # Imports
 #----------------------------------------------------------------------------#
-from email.policy import default
 import os
-import sys
-from distutils.command.config import config
-import json
-import dateutil.parser
-import babel
+import csv
+import functools
+import click
 from flask import (
+    Blueprint,
+    Flask,
+    Response,
     abort, 
     jsonify, 
     render_template,
     request, 
     flash, 
     redirect, 
+    stream_with_context,
     url_for
   )
 import logging
 from logging import Formatter, FileHandler
-from flask_wtf import Form
 from datetime import datetime
+from sqlalchemy.exc import IntegrityError
 from models import ( 
     Venue, 
     Show, 
     Artist, 
-    app, 
     moment, 
     db, 
-    migrate
+    init_db
   )
-from forms import ShowForm, ArtistForm, VenueForm
+from forms import ShowForm, BulkShowForm, ArtistForm, VenueForm
+from queries import (
+    venue_areas,
+    show_page,
+    search_results,
+    show_search,
+    venue_detail,
+    artist_detail,
+    recent_listings,
+    artist_list,
+    related_artist_ids,
+    related_venue_ids,
+    venues_near
+  )
+from cache import cache
+from summary import record_show
+from availability import DEFAULT_DURATION, MAX_DURATION, conflicts
+from scheduling import MAX_SHOWS, booked_cache_keys, schedule_shows
+from archive import remove_venue
+from autocomplete import KINDS as AUTOCOMPLETE_KINDS, autocomplete
+from commands import fyyur_cli
+from export import EXPORTS, export_stream, gzipped
+from api import api
+from profiler import profiler
+from templating import init_templates
+from assets import assets
 
 #----------------------------------------------------------------------------#
 # App Config.
 #----------------------------------------------------------------------------#
 
+# SQLSTATE raised by an exclusion constraint (a double booking).
+EXCLUSION_VIOLATION = '23P01'
+
+# Columns of a line of the bulk show form.
+SHOW_LINE_COLUMNS = ('artist_id', 'venue_id', 'start_time', 'duration')
+
+# The pages; create_app() registers them next to the API blueprint.
+pages = Blueprint('pages', __name__)
+
+
+def create_app(config='config'):
+  app = Flask(__name__)
+  app.config.from_object(config)
+  init_db(app)
+  moment.init_app(app)
+  cli = click.get_current_context(silent=True) is not None
+  if cli:
+    # Only the flask command (`flask db ...`) needs Flask-Migrate, and
+    # importing alembic is a large share of a cold start, so web workers
+    # never load it.
+    from flask_migrate import Migrate
+    Migrate(app, db)
+
+  cache.init_app(app)
+  autocomplete.init_app(app)
+  app.cli.add_command(fyyur_cli)
+  app.register_blueprint(pages)
+  app.register_blueprint(api)
+  profiler.init_app(app, db)
+  assets.init_app(app)
+  init_templates(app)
+
+  if not app.debug:
+    file_handler = FileHandler('error.log')
+    file_handler.setFormatter(
+        Formatter('%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]')
+    )
+    app.logger.setLevel(logging.INFO)
+    file_handler.setLevel(logging.INFO)
+    app.logger.addHandler(file_handler)
+    app.logger.info('errors')
+  return app
 
+#----------------------------------------------------------------------------#
+# Filters.
+#----------------------------------------------------------------------------#
 
-
-
-
-# TODO: connect to a local postgresql database;
+DATETIME_FORMATS = {
+    'full': "EEEE MMMM, d, y 'at' h:mma",
+    'medium': "EE MM, dd, y h:mma"
+}
+
+@functools.lru_cache(maxsize=None)
+def datetime_pattern(format, locale):
+  # Parsing the pattern and loading the locale dominate babel's cost per
+  # call, so each (format, locale) pair is only prepared once. babel is
+  # imported here, on the first date rendered, rather than at startup.
+  import babel
+  import babel.dates
+  return babel.dates.parse_pattern(DATETIME_FORMATS.get(format, format)), babel.Locale.parse(locale)
+
+@pages.app_template_filter('datetime')
+def format_datetime(value, format='medium', locale='en'):
+  if isinstance(value, str):
+      value = datetime.fromisoformat(value)
+  pattern, locale = datetime_pattern(format, locale)
+  return pattern.apply(value, locale)
+
+@pages.app_context_processor
+def release_db_connection():
+  # Context processors run just before a template renders. Page data is fully
+  # loaded by then, so end the read transaction and hand the connection back
+  # to the pool instead of holding it through rendering and the response.
+  db.session.close()
+  return {}
 
 #----------------------------------------------------------------------------#
-# Filters.
+# Cache.
 #----------------------------------------------------------------------------#
 
-def format_datetime(value, format='medium'):
-  date = dateutil.parser.parse(value)
-  if format == 'full':
-      format="EEEE MMMM, d, y 'at' h:mma"
-  elif format == 'medium':
-      format="EE MM, dd, y h:mma"
-  return babel.dates.format_datetime(date, format, locale='en')
+def venue_cache_keys(venue_id, artist_ids=None):
+  # The venue's own page, the listings it appears in, and every artist page
+  # that lists one of its shows.
+  if artist_ids is None:
+    artist_ids = related_artist_ids(venue_id)
+  return ['index', 'venues', f'venue:{venue_id}'] + [
+    f'artist:{artist_id}' for artist_id in artist_ids]
 
-app.jinja_env.filters['datetime'] = format_datetime
+def artist_cache_keys(artist_id):
+  return ['index', 'artists', f'artist:{artist_id}'] + [
+    f'venue:{venue_id}' for venue_id in related_venue_ids(artist_id)]
+
+@pages.route('/cache/stats')
+def cache_stats():
+  return jsonify(cache.stats())
 
 #----------------------------------------------------------------------------#
 # Controllers.
 #----------------------------------------------------------------------------#
 
-@app.route('/')
+@pages.route('/autocomplete')
+def autocomplete_names():
+  # JSON: up to ?limit= (default 10) artist or venue names with a word
+  # starting with ?q=, answered from memory.
+  kind = request.args.get('type', '')
+  if kind not in AUTOCOMPLETE_KINDS:
+    abort(400)
+  limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+  return jsonify({'results': autocomplete.search(kind, request.args.get('q', ''), limit)})
+
+@pages.route('/')
 def index():
     try:
-        try:
-            recently_artists = db.session.query(Artist).order_by(
-                Artist.id.desc()).limit(10).all()
-        except:
-            flash(f"Error fetching recently listed artists!")
-
-        try:
-            recently_venues = db.session.query(Venue).order_by(
-                Venue.id.desc()).limit(10).all()
-        except:
-            flash(f"Error fetching recently listed venues!")
-
-        artists = []
-        venues = []
-
-        for artist in recently_artists:
-            artists.append({
-              'id': artist.id,
-              'name': artist.name
-            })
-
-        for venue in recently_venues:
-            venues.append({
-              'id' :venue.id,
-              'name':venue.name
-            })
-
-        data = {
-            "artists": artists,
-            "venues": venues
-        }
+        data = cache.get_or_set('index', recent_listings)
     except:
         flash(f"Sorry, could not fetch recently listed data!",
               category="error")
@@ -106,130 +186,61 @@ def index():
 #  Venues
 #  ----------------------------------------------------------------
 
-@app.route('/venues')
+@pages.route('/venues')
 def venues():
+  data = []
   try:
-      data = []
-      venues = db.session.query(Venue.city, Venue.state).distinct().all()
-      for sc in venues:
-        state_city = Venue.query.filter_by(state=sc.state).filter_by(city=sc.city).all()
-        subdata = []
-        current_time = datetime.now().strftime('%Y-%m-%d %H:%M')
-
-        for venue in state_city:
-          subdata.append({
-            'id': venue.id,
-            'name': venue.name,
-            'num_upcoming_show': Show.query.filter(db.and_(Show.created_time > current_time, Show.venue_id == venue.id)).count()
-          })
-        data.append({
-          'city': sc.city,
-          'state': sc.state,
-          'venues':subdata
-        })
+      data = cache.get_or_set('venues', venue_areas)
   except Exception as e:
       print(e)
   finally:
     return render_template('pages/venues.html', areas=data )
   
   
-def get_search_result(search_word, schema):
-  try:
-    data = schema.query.filter(db.func.lower(schema.name).like(
-      f'%{search_word.lower()}%')).order_by('name').all()
-    return data
-  except Exception as e:
-     print(e)
-
-@app.route('/venues/search', methods=['POST'])
+@pages.route('/venues/near')
+def near_venues():
+  # JSON: venues within ?radius= km (default 25) of ?lat=&lng=, nearest first.
+  lat = request.args.get('lat', type=float)
+  lng = request.args.get('lng', type=float)
+  radius = request.args.get('radius', 25.0, type=float)
+  if lat is None or lng is None or not -90 <= lat <= 90 or not -180 <= lng <= 180:
+    abort(400)
+  if not 0 < radius <= 1000:
+    abort(400)
+  limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+  return jsonify(venues_near(lat, lng, radius, limit))
+
+@pages.route('/venues/search', methods=['POST'])
 def search_venues():
+  response = {}
   try:
-    data = get_search_result(request.form['search_term'], Venue)
-    vens = []
-    current_time = datetime.now().strftime('%Y-%m-%d %H:%M')
-    for venue in data:
-       vens.append({
-        'id': venue.id,
-        'name': venue.name,
-        'num_upcoming_show': Show.query.filter(db.and_(Show.created_time > current_time, Show.venue_id == venue.id)).count()
-       })
-    response = {
-       'count': len(data),
-       'data': vens
-    }
+    response = search_results(Venue, request.form['search_term'])
   except:
     flash('Sorry, something went wrong while searching. Please try again', category="error")
-  
-  finally:
-    return render_template('pages/search_venues.html', results=response, search_term=request.form.get('search_term', ''))
+  return render_template('pages/search_venues.html', results=response, search_term=request.form.get('search_term', ''))
 
  
 
-@app.route('/venues/<int:venue_id>')
+@pages.route('/venues/<int:venue_id>')
 def show_venue(venue_id):
-  data = {}
   try:
-    venue = Venue.query.filter(Venue.id == venue_id).first()
-
-    current_time = datetime.now().strftime('%Y-%m-%d %H:%M')
-    past_events = db.session.query(Show).join(Artist).filter(
-        db.and_(Show.created_time < current_time, Show.venue_id == venue_id)).all()
-    past_shows = []
-    for artist in past_events:
-        past_show = {
-          'artist_id':artist.id,
-          'artist_name': artist.name,
-          'artist_image_link': artist.image_link,
-          'start_time': str(Show.current_date)
-        }
-        past_shows.append( past_show )
-    
-    upcoming_events = db.session.query(Show).join(Artist).filter(
-        db.and_(Show.created_time > current_time, Show.venue_id == venue_id)).all()
-    upcoming_shows = []
-    for artist in upcoming_events:
-        upcoming_show = {
-          'artist_id':artist.id,
-          'artist_name': artist.name,
-          'artist_image_link': artist.image_link,
-          'start_time': str(Show.current_date)
-        }
-        upcoming_shows.append( upcoming_show )
-
-    data = {
-        'id': venue.id,
-        'name': venue.name,
-        'genres': venue.genres,
-        'address': venue.address,
-        'city': venue.city,
-        'state': venue.state,
-        'phone': venue.phone,
-        'website': venue.website_link,
-        'facebook_link':venue.facebook_link,
-        'seeking_talent': venue.seeking_talent,
-        'seeking_description': venue.seeking_desc,
-        'image_link': venue.image_link,
-        'past_shows':past_shows,
-        'upcoming_shows':upcoming_shows,
-        'past_shows_count': len(past_shows),
-        'upcoming_shows_count':len(upcoming_shows)
-    }
-   
+    data = cache.get_or_set(f'venue:{venue_id}', lambda: venue_detail(venue_id))
   except:
-      flash('Sorry, there is no info regarding' + venue.id, category='info')
-  
-  finally:
-      return render_template('pages/show_venue.html', venue=data)
+      flash('Sorry, the venue could not be loaded', category='error')
+      abort(500)
+  if data is None:
+      abort(404)
+  return render_template('pages/show_venue.html', venue=data)
 #  Create Venue
 #  ----------------------------------------------------------------
 
-@app.route('/venues/create', methods=['GET'])
+@pages.route('/venues/create', methods=['GET'])
 def create_venue_form():
   form = VenueForm()
   return render_template('forms/new_venue.html', form=form)
 
 
-@app.route('/venues/create', methods=['POST'])
+@pages.route('/venues/create', methods=['POST'])
 def create_venue_submission():
   form = VenueForm(request.form)
   try:
@@ -247,20 +258,24 @@ def create_venue_submission():
       seeking_desc=request.form['seeking_description'])
       db.session.add(venue)
       db.session.commit()
+      cache.delete('index', 'venues')
+      autocomplete.add('venue', venue.id, venue.name)
       flash('Venue ' + request.form['name'] + ' was successfully listed!')
   except:
       db.session.rollback()
       flash('An error occurred. Artist ' + request.form['name']  + ' could not be listed.')
   finally:
       db.session.close()
-      return render_template('pages/home.html', form=form)
+      return redirect(url_for('pages.index'))
  
 
-@app.route('/venues/<venue_id>', methods=['DELETE'])
+@pages.route('/venues/<venue_id>', methods=['DELETE'])
 def delete_venue(venue_id):
   try:
-    Venue.query.filter(Venue.id == venue_id).delete()
+    artist_ids = remove_venue(venue_id)
     db.session.commit()
+    autocomplete.remove('venue', int(venue_id))
+    cache.delete(*venue_cache_keys(venue_id, artist_ids))
     flash('Venue with id' + venue_id + 'was deleted succesfully')
   except:
     flash('Venue with id' + venue_id + 'could not be deleted', category='error')
@@ -272,102 +287,37 @@ def delete_venue(venue_id):
 
 #  Artists
 #  ----------------------------------------------------------------
-@app.route('/artists')
+@pages.route('/artists')
 def artists():
-  data = []
-  artists = db.session.query(Artist.id, Artist.name).all()
-  for artist in artists:
-    data.append({
-      'id':artist.id,
-      'name': artist.name
-    })
-    
+  data = cache.get_or_set('artists', artist_list)
   return render_template('pages/artists.html', artists=data)
 
 
 
-@app.route('/artists/search', methods=['POST'])
+@pages.route('/artists/search', methods=['POST'])
 def search_artists():
   response = {}
   try:
-    data = get_search_result(request.form['search_term'], Artist)
-    artists = []
-    current_time = datetime.now().strftime('%Y-%m-%d %H:%M')
-    for artist in data:
-      artists.append({
-        'id': artist.id,
-        'name':artist.name,
-        'num_upcoming_show': Show.query.filter(db.and_(Show.created_time > current_time, Show.artist_id == artist.id)).count()
-      })
-    response = {
-      'count':len(data),
-      'data':artists
-    }
-      
+    response = search_results(Artist, request.form['search_term'])
   except:
       flash('Sorry, something went wrong while searching. Please try again', category="error")
-   
-  finally:
-      return render_template('pages/search_artists.html', results=response, search_term=request.form.get('search_term', ''))
+  return render_template('pages/search_artists.html', results=response, search_term=request.form.get('search_term', ''))
 
-@app.route('/artists/<int:artist_id>')
+@pages.route('/artists/<int:artist_id>')
 def show_artist(artist_id):
-  data = {}
   try:
-    artist = Artist.query.filter(Artist.id == artist_id).first()
-    current_time = datetime.now().strftime('%Y-%m-%d %H:%M')
-    past_events = db.session.query(Show).join(Venue).filter(
-        db.and_(Show.created_time < current_time, Show.artist_id == artist_id)).all()
-    past_shows = []
-    for venue in past_events:
-        past_show = {
-          'venue_id':venue.id,
-          'venue_name': venue.name,
-          'venue_image_link': venue.image_link,
-          'start_time': str(Show.current_date)
-        }
-        past_shows.append( past_show )
-    
-    upcoming_events = db.session.query(Show).join(Venue).filter(
-        db.and_(Show.created_time > current_time, Show.artist_id == artist_id)).all()
-    upcoming_shows = []
-    for venue in upcoming_events:
-        upcoming_show = {
-          'venue_id':venue.id,
-          'venue_name': venue.name,
-          'venue_image_link': venue.image_link,
-          'start_time': str(Show.current_date)
-        }
-        upcoming_shows.append( upcoming_show )
-
-    data = {
-        'id': artist.id,
-        'name': artist.name,
-        'genres': artist.genres,
-        'city': artist.city,
-        'state': artist.state,
-        'phone': artist.phone,
-        'website': artist.website_link,
-        'facebook_link':artist.facebook_link,
-        'seeking_venue': artist.seeking_venue,
-        'seeking_description': artist.seeking_desc,
-        'image_link': artist.image_link,
-        'past_shows':past_shows,
-        'upcoming_shows':upcoming_shows,
-        'past_shows_count': len(past_shows),
-        'upcoming_shows_count':len(upcoming_shows)
-    }
-   
+    data = cache.get_or_set(f'artist:{artist_id}', lambda: artist_detail(artist_id))
   except:
-      flash('Sorry, there is no info regarding' + artist.id, category='info')
-  
-  finally:
-      return render_template('pages/show_artist.html', artist=data)
+      flash('Sorry, the artist could not be loaded', category='error')
+      abort(500)
+  if data is None:
+      abort(404)
+  return render_template('pages/show_artist.html', artist=data)
 
 
 #  Update
 #  ----------------------------------------------------------------
-@app.route('/artists/<int:artist_id>/edit', methods=['GET'])
+@pages.route('/artists/<int:artist_id>/edit', methods=['GET'])
 def edit_artist(artist_id):
     try:
         data = Artist.query.filter(Artist.id == artist_id).first()
@@ -387,7 +337,7 @@ def edit_artist(artist_id):
         return render_template('forms/edit_artist.html', form=artist_form, artist=data) 
   
 
-@app.route('/artists/<int:artist_id>/edit', methods=['POST'])
+@pages.route('/artists/<int:artist_id>/edit', methods=['POST'])
 def edit_artist_submission(artist_id):
   form = ArtistForm(request.form)
 
@@ -405,17 +355,19 @@ def edit_artist_submission(artist_id):
         data.seeking_venue = request.form.get('seeking_venue', type=bool)
         data.seeking_desc = request.form['seeking_description']
         db.session.commit()
+        cache.delete(*artist_cache_keys(artist_id))
+        autocomplete.add('artist', artist_id, request.form['name'])
         flash('You have successfully updated your information')
       except:
         flash('Sorry, the artist could not be updated', category ='error')
         db.session.rollback()
       finally:
         db.session.close()
-  return redirect(url_for('show_artist', artist_id=artist_id))
+  return redirect(url_for('pages.show_artist', artist_id=artist_id))
   
   
 
-@app.route('/venues/<int:venue_id>/edit', methods=['GET'])
+@pages.route('/venues/<int:venue_id>/edit', methods=['GET'])
 def edit_venue(venue_id):
   try:
     data = Venue.query.filter(Venue.id == venue_id).first()
@@ -436,7 +388,7 @@ def edit_venue(venue_id):
   finally:
       return render_template('forms/edit_venue.html', form=venue_form, venue=data) 
 
-@app.route('/venues/<int:venue_id>/edit', methods=['POST'])
+@pages.route('/venues/<int:venue_id>/edit', methods=['POST'])
 def edit_venue_submission(venue_id):
   form = VenueForm(request.form)
   if form.validate():
@@ -454,24 +406,26 @@ def edit_venue_submission(venue_id):
         data.seeking_venue = request.form.get('seeking_venue', type=bool)
         data.seeking_desc = request.form['seeking_description']
         db.session.commit()
+        cache.delete(*venue_cache_keys(venue_id))
+        autocomplete.add('venue', venue_id, request.form['name'])
         flash('You have successfully updated your information')
       except:
         flash('Sorry, the venue could not be updated', category ='error')
         db.session.rollback()
       finally:
         db.session.close()
-  return redirect(url_for('show_venue', venue_id=venue_id))
+  return redirect(url_for('pages.show_venue', venue_id=venue_id))
 
 #  Create Artist
 #  ----------------------------------------------------------------
 
-@app.route('/artists/create', methods=['GET'])
+@pages.route('/artists/create', methods=['GET'])
 def create_artist_form():
   form = ArtistForm()
   return render_template('forms/new_artist.html', form=form)
 
 
-@app.route('/artists/create', methods=['POST'])
+@pages.route('/artists/create', methods=['POST'])
 def create_artist_submission():
     form = ArtistForm(request.form)
     try:
@@ -489,6 +443,8 @@ def create_artist_submission():
         # on successful db insert, flash success
         db.session.add(artist)
         db.session.commit()
+        cache.delete('index', 'artists')
+        autocomplete.add('artist', artist.id, artist.name)
         flash('Artist ' + request.form['name'] + ' was successfully listed!')
 
     except:
@@ -496,38 +452,34 @@ def create_artist_submission():
       flash('An error occurred. Artist ' + request.form['name']  + ' could not be listed.')
     finally:
       db.session.close()
-    return render_template('pages/home.html', form=form)
+    return redirect(url_for('pages.index'))
 
 
 #  Shows
 #  ----------------------------------------------------------------
 
-@app.route('/shows')
+@pages.route('/shows')
 def shows():
   data = []
+  next_cursor = None
+  limit = min(max(request.args.get('limit', 30, type=int), 1), 100)
   try:
-    shows = Show.query.all()
-    for show in shows:
-      data.append({
-        'venue_id': show.venue_id,
-        'venue_name': Venue.query.filter( Venue.id == show.venue_id).first().name,
-        'artist_name':Artist.query.filter( Artist.id == show.artist_id).first().name,
-        'artist_image_link':Artist.query.filter( Artist.id == show.artist_id).first().image_link,
-        'start_time': str(show.created_time)
-      } )
+    data, next_cursor = show_page(request.args.get('after'), limit)
+  except ValueError:
+      abort(400)
   except:
       flash(f'Error fetching shows data')
-  finally:
-      return render_template('pages/shows.html', shows=data)
+  return render_template('pages/shows.html', shows=data, next_cursor=next_cursor, limit=limit)
 
-@app.route('/shows/create')
+@pages.route('/shows/create')
 def create_shows():
   # renders form. do not touch.
   form = ShowForm() 
   return render_template('forms/new_show.html', form=form)
 
-@app.route('/shows/create', methods=['POST'])
+@pages.route('/shows/create', methods=['POST'])
 def create_show_submission():
+  form = ShowForm(request.form)
   try:
         artistFound = True
         venueFound = True
@@ -539,10 +491,25 @@ def create_show_submission():
             venueFound = False
             raise ValueError
 
-        show = Show(artist_id=request.form['artist_id'],
-                    venue_id=request.form['venue_id'], created_time=datetime.fromisoformat(str(request.form['start_time'])))
+        artist_id = int(request.form['artist_id'])
+        venue_id = int(request.form['venue_id'])
+        start_time = datetime.fromisoformat(request.form['start_time'])
+        duration = request.form.get('duration', DEFAULT_DURATION, type=int)
+        if not 15 <= duration <= MAX_DURATION:
+            raise ValueError('the duration must be between 15 minutes and a day')
+
+        # The exclusion constraints on `shows` have the final say; checking
+        # first gives a clear message in the common case.
+        artist_shows, venue_shows = conflicts(artist_id, venue_id, start_time, duration)
+        if artist_shows or venue_shows:
+            flash(f"Show could not be listed, because the {'artist' if artist_shows else 'venue'} is already booked at that time!", category="error")
+            return render_template('forms/new_show.html', form=form), 409
+
+        show = Show(artist_id=artist_id, venue_id=venue_id, created_time=start_time, duration_minutes=duration)
         db.session.add(show)
+        record_show(venue_id, artist_id, show.created_time)
         db.session.commit()
+        cache.delete('venues', f"venue:{venue_id}", f"artist:{artist_id}")
         # on successful db insert, flash success
         flash('Show was successfully listed!')
   except ValueError as e:
@@ -550,6 +517,13 @@ def create_show_submission():
             f"""Show could not be listed{f" because the {'Artist' if not artistFound else 'Venue' if not venueFound else ''} ID provided does not exist in our database" if not artistFound or not venueFound else f', because {e}'}!""", category="error")
         db.session.rollback()
         abort(500)
+  except IntegrityError as e:
+        db.session.rollback()
+        if getattr(e.orig, 'pgcode', None) != EXCLUSION_VIOLATION:
+            flash(f"""Show could not be listed{f', because {e}'}!""", category="error")
+            abort(500)
+        flash('Show could not be listed, because the artist or venue is already booked at that time!', category="error")
+        return render_template('forms/new_show.html', form=form), 409
   except Exception as e:
         flash(
             f"""Show could not be listed{f', because {e}'}!""", category="error")
@@ -557,77 +531,106 @@ def create_show_submission():
         abort(500)
   finally:
         db.session.close()
-  return redirect(url_for('index'))
+  return redirect(url_for('pages.index'))
+
+
+@pages.route('/shows/bulk')
+def create_show_list():
+  form = BulkShowForm()
+  return render_template('forms/bulk_shows.html', form=form)
+
+@pages.route('/shows/bulk', methods=['POST'])
+def create_show_list_submission():
+  form = BulkShowForm(request.form)
+  lines = [line.strip() for line in request.form.get('shows', '').splitlines() if line.strip()]
+  if not lines or len(lines) > MAX_SHOWS:
+    flash(f'Please enter between 1 and {MAX_SHOWS} shows, one per line.', category="error")
+    return render_template('forms/bulk_shows.html', form=form), 400
+
+  rows = [dict(zip(SHOW_LINE_COLUMNS, (cell.strip() for cell in cells))) for cells in csv.reader(lines)]
+  try:
+    booked, errors = schedule_shows(rows)
+  except Exception as e:
+    db.session.rollback()
+    flash(f'Shows could not be listed, because {e}!', category="error")
+    abort(500)
+  finally:
+    db.session.close()
+  cache.delete(*booked_cache_keys(booked))
+  if booked:
+    flash(f'{len(booked)} shows were successfully listed!')
+  if not errors:
+    return redirect(url_for('pages.index'))
+
+  # Send back only the failed lines, to be corrected and resubmitted.
+  form.shows.data = '\n'.join(lines[row_number - 1] for row_number, _ in errors)
+  errors = [(row_number, lines[row_number - 1], error) for row_number, error in errors]
+  return render_template('forms/bulk_shows.html', form=form, errors=errors), 200 if booked else 422
 
 
-@app.route('/shows/search', methods=['POST'])
+@pages.route('/shows/search', methods=['POST'])
 def search_show():
     response = {}
     try:
-        shows = []
-        print(request.form['filter_by'], request.form['filter_by'])
-        if request.form['filter_by'] == 'venue':
-            shows = db.session.query(Show).join(Venue).filter(Show.venue_id == Venue.id).filter(db.func.lower(Venue.name).like(
-                f"%{request.form['search_term'].lower()}%")).order_by('id').all()
-        if request.form['filter_by'] == 'artist':
-            shows = db.session.query(Show).join(Artist).filter(Show.artist_id == Artist.id).filter(db.func.lower(Artist.name).like(
-                f"%{request.form['search_term'].lower()}%")).order_by('id').all()
-        print(shows)
-        data = []
-
-        for show in shows:
-            info = {
-              'venue_id': show.venue_id,
-              'venue_name': show.venue.name,
-              'artist_id': show.artist_id,
-              'artist_name': show.artist.name,
-              'artist_image_link': show.artist.image_link,
-              'start_time': str(show.start_time)
-            }
-            data.append(info)
-            response = {
-              'count' : len(shows),
-              'data' : data
-            }
+        response = show_search(request.form['filter_by'], request.form['search_term'])
     except:
         flash(
             f"Sorry, an error occurred while fetching search results.", category="error")
-        db.session.close()
-        abort(500)
-    finally:
-        return render_template('pages/search_show.html', results=response, search_term=request.form.get('search_term', ''))
+    return render_template('pages/search_show.html', results=response, search_term=request.form.get('search_term', ''))
+
 
+#  Export
+#  ----------------------------------------------------------------
 
-@app.errorhandler(404)
+@pages.route('/export/<kind>')
+def export_catalog(kind):
+  if kind not in EXPORTS:
+    abort(404)
+  fmt = request.args.get('format', 'ndjson')
+  if fmt not in ('ndjson', 'csv'):
+    abort(400)
+  since = None
+  if request.args.get('since'):
+    try:
+      since = datetime.fromisoformat(request.args['since'])
+    except ValueError:
+      abort(400)
+
+  body = export_stream(EXPORTS[kind], fmt, since)
+  headers = {
+    'Content-Disposition': f'attachment; filename={kind}.{fmt}',
+    'Vary': 'Accept-Encoding'
+  }
+  if 'gzip' in request.accept_encodings:
+    body = gzipped(body)
+    headers['Content-Encoding'] = 'gzip'
+  mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+  return Response(stream_with_context(body), mimetype=mimetype, headers=headers)
+
+
+@pages.app_errorhandler(404)
 def not_found_error(error):
     return render_template('errors/404.html'), 404
 
-@app.errorhandler(500)
+@pages.app_errorhandler(500)
 def server_error(error):
     return render_template('errors/500.html'), 500
 
 
-if not app.debug:
-    file_handler = FileHandler('error.log')
-    file_handler.setFormatter(
-        Formatter('%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]')
-    )
-    app.logger.setLevel(logging.INFO)
-    file_handler.setLevel(logging.INFO)
-    app.logger.addHandler(file_handler)
-    app.logger.info('errors')
-
 #----------------------------------------------------------------------------#
 # Launch.
 #----------------------------------------------------------------------------#
 
+# Importing this module builds nothing; wsgi.py holds the instance that
+# `flask run` (FLASK_APP=wsgi), gunicorn (wsgi:app) and the scripts use.
+# Call create_app() for another, e.g. with a different config object.
+
 # Default port:
 # if __name__ == '__main__':
-#     app.run()
+#     create_app().run()
 
 # Or specify port manually:
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port)
-
+    create_app().run(host='0.0.0.0', port=port)
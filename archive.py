@@ -0,0 +1,126 @@
+import re
+from datetime import datetime
+from models import Venue, Show, ShowHistory, Artist, db
+from summary import refresh_summaries, rebuild_summaries
+
+#----------------------------------------------------------------------------#
+# Show archive.
+#----------------------------------------------------------------------------#
+# `shows` keeps the upcoming shows and the recent past. Older shows are
+# moved into show_history, which PostgreSQL partitions by month, so indexes
+# and scans on `shows` stay the size of the live schedule rather than of all
+# history. (`shows` itself can't be partitioned: its no-overlap exclusion
+# constraints would have to include the partition key.)
+#
+# Listings and searches read `shows` only. Venue and artist pages list their
+# latest past shows from both tables (queries.detail_show_rows), and the past
+# counts in the summaries include the archive. Whole months of history can be
+# detached from show_history, to be dumped and dropped.
+
+COLUMNS = ('id', 'artist_id', 'venue_id', 'created_time', 'duration_minutes', 'updated_at')
+PARTITION_NAME = re.compile(r'^show_history_y(\d{4})m(\d{2})$')
+
+
+def month_start(value):
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_month(month):
+    return month.replace(year=month.year + 1, month=1) if month.month == 12 else month.replace(month=month.month + 1)
+
+
+def is_postgresql():
+    return db.engine.dialect.name == 'postgresql'
+
+
+def ensure_partition(month):
+    if not is_postgresql():
+        return
+    # Partition bounds can't be bind parameters; both are formatted datetimes.
+    db.session.execute(db.text(
+        f"CREATE TABLE IF NOT EXISTS show_history_y{month:%Y}m{month:%m} PARTITION OF show_history "
+        f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{next_month(month):%Y-%m-%d}')"))
+
+
+def move_shows(start, end):
+    columns = ', '.join(COLUMNS)
+    if is_postgresql():
+        # One statement: the deleted rows feed the insert.
+        return db.session.execute(db.text(f'''
+            WITH moved AS (
+                DELETE FROM shows WHERE created_time >= :start AND created_time < :end
+                RETURNING {columns}
+            )
+            INSERT INTO show_history ({columns}) SELECT {columns} FROM moved
+        '''), {'start': start, 'end': end}).rowcount
+    shows = Show.__table__
+    window = db.and_(shows.c.created_time >= start, shows.c.created_time < end)
+    db.session.execute(ShowHistory.__table__.insert().from_select(
+        COLUMNS, db.select(*(shows.c[column] for column in COLUMNS)).where(window)))
+    return db.session.execute(shows.delete().where(window)).rowcount
+
+
+def archive_shows(before):
+    """Move the shows that started before `before` into show_history.
+
+    Works a month per transaction, skipping empty months; returns the number
+    of shows moved.
+    """
+    before = min(before, datetime.now())
+    moved = 0
+    start = db.session.query(db.func.min(Show.created_time)).filter(Show.created_time < before).scalar()
+    while start is not None:
+        month = month_start(start)
+        end = min(next_month(month), before)
+        ensure_partition(month)
+        moved += move_shows(month, end)
+        db.session.commit()
+        start = db.session.query(db.func.min(Show.created_time)).filter(
+            Show.created_time >= end, Show.created_time < before).scalar()
+    return moved
+
+
+def detach_partitions(before):
+    """Detach the show_history partitions of the months before `before`.
+
+    The detached tables keep their rows (to dump, then drop) but leave the
+    archive, so the summaries are rebuilt. Returns the detached table names.
+    """
+    if not is_postgresql():
+        return []
+    names = db.session.execute(db.text('''
+        SELECT child.relname FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = 'show_history'
+        ORDER BY child.relname
+    ''')).scalars().all()
+    detached = []
+    for name in names:
+        match = PARTITION_NAME.match(name)
+        if match and next_month(datetime(int(match[1]), int(match[2]), 1)) <= before:
+            db.session.execute(db.text(f'ALTER TABLE show_history DETACH PARTITION {name}'))
+            detached.append(name)
+    db.session.commit()
+    if detached:
+        rebuild_summaries()
+    return detached
+
+
+def remove_venue(venue_id):
+    """Delete a venue with its live and archived shows.
+
+    Plain DELETE statements, so no show is loaded into the session. Returns
+    the ids of the artists that had shows there, with their summaries
+    already refreshed; the caller commits.
+    """
+    artist_ids = db.session.execute(
+        db.select(Show.artist_id).where(Show.venue_id == venue_id).union(
+            db.select(ShowHistory.artist_id).where(ShowHistory.venue_id == venue_id))
+    ).scalars().all()
+    for table in (ShowHistory.__table__, Show.__table__):
+        db.session.execute(table.delete().where(table.c.venue_id == venue_id))
+    venues = Venue.__table__
+    db.session.execute(venues.delete().where(venues.c.id == venue_id))
+    refresh_summaries(Artist, artist_ids)
+    return artist_ids
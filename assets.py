@@ -0,0 +1,258 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+from flask import abort, current_app, request, send_from_directory, url_for
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Both are in requirements.txt; the CSS fallback below only covers a bare
+# install, and without rjsmin JS is bundled unminified.
+try:
+    import rcssmin
+except ImportError:
+    rcssmin = None
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+#----------------------------------------------------------------------------#
+# Static assets.
+#----------------------------------------------------------------------------#
+# `flask fyyur build-assets` concatenates the bundles below, minifies them,
+# copies every file under static/ to a content-hashed name in ASSETS_DIR,
+# writes .gz (and .br with the `brotli` package) next to text files, and
+# records logical -> hashed names in manifest.json. Hashed files never
+# change, so /assets/ serves them with a year-long immutable Cache-Control.
+# Without a build (e.g. in development) the templates get the plain
+# /static/ URLs of the source files instead. ASSETS_DIR is replaced on every
+# build, so it has to be a directory inside static/.
+
+BUNDLES = {
+    'css/app.css': [
+        'css/bootstrap.min.css',
+        'css/layout.main.css',
+        'css/main.css',
+        'css/main.responsive.css',
+        'css/main.quickfix.css'
+    ],
+    'js/head.js': [
+        'js/libs/modernizr-2.8.2.min.js'
+    ],
+    'js/app.js': [
+        'js/libs/jquery-1.11.1.min.js',
+        'js/libs/bootstrap-3.1.1.min.js',
+        'js/libs/moment.min.js',
+        'js/plugins.js',
+        'js/script.js'
+    ]
+}
+
+COMPRESSIBLE = ('.css', '.js', '.map', '.svg', '.json', '.txt', '.eot', '.ttf', '.otf')
+CSS_URL = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+CSS_LITERAL = re.compile(r'"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'|/\*.*?\*/', re.DOTALL)
+SOURCE_MAP = re.compile(r'^\s*//[#@] sourceMappingURL=.*$', re.MULTILINE)
+ONE_YEAR = 365 * 24 * 60 * 60
+
+
+def squeeze_css(code):
+    code = re.sub(r'\s+', ' ', code)
+    code = re.sub(r'\s*([{};,>])\s*', r'\1', code)
+    return code.replace(';}', '}')
+
+
+def minify_css(text):
+    if rcssmin is not None:
+        return rcssmin.cssmin(text, keep_bang_comments=True)
+    # Conservative fallback: drop comments (except /*! licences */) and
+    # whitespace that can never matter, leaving strings as they are.
+    parts = []
+    code = []
+    position = 0
+    for match in CSS_LITERAL.finditer(text):
+        code.append(text[position:match.start()])
+        position = match.end()
+        literal = match.group(0)
+        if literal.startswith('/*') and not literal.startswith('/*!'):
+            continue
+        parts.extend((squeeze_css(''.join(code)), literal))
+        code = []
+    code.append(text[position:])
+    parts.append(squeeze_css(''.join(code)))
+    return ''.join(parts).strip()
+
+
+def minify_js(text):
+    if rjsmin is not None:
+        return rjsmin.jsmin(text, keep_bang_comments=True)
+    # No safe regex minifier for JS; the libraries are already minified.
+    return text
+
+
+def hashed_name(name, data):
+    root, ext = os.path.splitext(name)
+    return f'{root}.{hashlib.sha256(data).hexdigest()[:12]}{ext}'
+
+
+def rewrite_css_urls(text, source, manifest, prefix):
+    # Point url(...) references at the hashed copies; unknown targets and
+    # data: URIs are left alone.
+    base = os.path.dirname(source)
+
+    def replace(match):
+        url = match.group(2)
+        path = re.split(r'[?#]', url, maxsplit=1)[0]
+        if url.startswith(('data:', 'http:', 'https:', '//', '/')):
+            return match.group(0)
+        target = os.path.normpath(os.path.join(base, path)).replace(os.sep, '/')
+        if target not in manifest:
+            return match.group(0)
+        return f'url("{prefix}/{manifest[target]}{url[len(path):]}")'
+
+    return CSS_URL.sub(replace, text)
+
+
+def write(output, name, data):
+    path = os.path.join(output, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+    if name.endswith(COMPRESSIBLE):
+        with open(path + '.gz', 'wb') as f:
+            f.write(gzip.compress(data, 9, mtime=0))
+        if brotli is not None:
+            with open(path + '.br', 'wb') as f:
+                f.write(brotli.compress(data))
+
+
+def build(source, output, prefix='/assets'):
+    """Build the hashed assets from `source` into `output`; returns the manifest.
+
+    `output` is deleted and rewritten, so it must be a directory inside
+    `source`; anything else raises ValueError.
+    """
+    source, output = os.path.abspath(source), os.path.abspath(output)
+    if output == source or os.path.commonpath([source, output]) != source:
+        raise ValueError(f'{output} is not a directory inside {source}; not replacing it')
+    if os.path.isdir(output):
+        shutil.rmtree(output)
+    manifest = {}
+    stylesheets = []
+    for directory, dirnames, filenames in os.walk(source):
+        dirnames[:] = [d for d in dirnames if os.path.abspath(os.path.join(directory, d)) != output]
+        for filename in filenames:
+            if filename.startswith('.'):
+                continue
+            path = os.path.join(directory, filename)
+            name = os.path.relpath(path, source).replace(os.sep, '/')
+            if name.endswith('.css'):
+                # After the files their url()s may point at.
+                stylesheets.append(name)
+                continue
+            with open(path, 'rb') as f:
+                data = f.read()
+            if name.endswith('.js') and not name.endswith('.min.js'):
+                data = minify_js(data.decode('utf-8')).encode('utf-8')
+            manifest[name] = hashed_name(name, data)
+            write(output, manifest[name], data)
+
+    texts = {}
+    for name in stylesheets:
+        with open(os.path.join(source, name), encoding='utf-8') as f:
+            text = rewrite_css_urls(f.read(), name, manifest, prefix)
+        texts[name] = text if name.endswith('.min.css') else minify_css(text)
+        data = texts[name].encode('utf-8')
+        manifest[name] = hashed_name(name, data)
+        write(output, manifest[name], data)
+
+    for bundle, members in BUNDLES.items():
+        parts = []
+        for member in members:
+            if member.endswith('.css'):
+                parts.append(texts[member])
+            else:
+                with open(os.path.join(source, member), encoding='utf-8') as f:
+                    text = SOURCE_MAP.sub('', f.read())
+                parts.append(text if member.endswith('.min.js') else minify_js(text))
+        # `;` guards against a script that ends without one.
+        data = ('\n' if bundle.endswith('.css') else ';\n').join(parts).encode('utf-8')
+        manifest[bundle] = hashed_name(bundle, data)
+        write(output, manifest[bundle], data)
+
+    with open(os.path.join(output, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+class AssetsState:
+    # One per app, in app.extensions['assets'].
+    def __init__(self, directory, prefix):
+        self.directory = directory
+        self.prefix = prefix
+        self.load()
+
+    def load(self):
+        try:
+            with open(os.path.join(self.directory, 'manifest.json')) as f:
+                self.manifest = json.load(f)
+        except FileNotFoundError:
+            self.manifest = {}
+
+
+class Assets:
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        state = app.extensions['assets'] = AssetsState(
+            app.config.get('ASSETS_DIR') or os.path.join(app.static_folder, 'dist'),
+            app.config.get('ASSETS_URL', '/assets'))
+        app.add_url_rule(f'{state.prefix}/<path:filename>', 'assets', self.serve)
+        app.jinja_env.globals.update(asset_url=self.url, asset_urls=self.urls)
+
+    @property
+    def state(self):
+        return current_app.extensions['assets']
+
+    def url(self, name):
+        """URL of a single file under static/."""
+        state = self.state
+        if name in state.manifest:
+            return f'{state.prefix}/{state.manifest[name]}'
+        return url_for('static', filename=name)
+
+    def urls(self, bundle):
+        """URLs to include for a bundle: the built file, or its sources."""
+        state = self.state
+        if bundle in state.manifest:
+            return [f'{state.prefix}/{state.manifest[bundle]}']
+        return [url_for('static', filename=name) for name in BUNDLES[bundle]]
+
+    def serve(self, filename):
+        if filename == 'manifest.json' or filename.endswith(('.gz', '.br')):
+            abort(404)
+        directory = self.state.directory
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+            if encoding in request.accept_encodings and os.path.isfile(
+                    os.path.join(directory, filename + suffix)):
+                response = send_from_directory(directory, filename + suffix, mimetype=mimetype)
+                response.headers['Content-Encoding'] = encoding
+                break
+        else:
+            response = send_from_directory(directory, filename, mimetype=mimetype)
+        response.headers['Cache-Control'] = f'public, max-age={ONE_YEAR}, immutable'
+        response.vary.add('Accept-Encoding')
+        return response
+
+
+assets = Assets()
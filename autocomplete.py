@@ -0,0 +1,155 @@
+import threading
+import time
+from bisect import bisect_left, insort
+from flask import current_app
+from sqlalchemy.exc import SQLAlchemyError
+from models import Venue, Artist, db
+
+#----------------------------------------------------------------------------#
+# Autocomplete.
+#----------------------------------------------------------------------------#
+# Artist and venue names are kept in memory as a sorted array of
+# (key, id) pairs, with one key per word of the name from that word on
+# ("the blue room", "blue room", "room"), so "blu" finds "The Blue Room". A
+# prefix lookup is a bisect plus a short scan; no query runs per keystroke.
+#
+# The arrays are first loaded by a background thread started on the first
+# request (importing the app, or a pre-fork server master, never queries) and
+# are updated by this worker's own creates, edits and deletes. Changes made by
+# other workers (or imports) show up when the same thread reloads the arrays,
+# every AUTOCOMPLETE_REFRESH seconds; requests keep searching the old arrays
+# meanwhile.
+
+KINDS = {
+    'artist': Artist,
+    'venue': Venue
+}
+
+
+class PrefixIndex:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = []
+        self.names = {}
+
+    @staticmethod
+    def keys(name):
+        words = name.casefold().split()
+        return {' '.join(words[start:]) for start in range(len(words))}
+
+    def reset(self, rows):
+        names = {ref_id: name for ref_id, name in rows if name}
+        entries = sorted((key, ref_id) for ref_id, name in names.items() for key in self.keys(name))
+        with self.lock:
+            self.names, self.entries = names, entries
+
+    def add(self, ref_id, name):
+        # Also used for renames: the old keys go first.
+        with self.lock:
+            self._remove(ref_id)
+            if name:
+                self.names[ref_id] = name
+                for key in self.keys(name):
+                    insort(self.entries, (key, ref_id))
+
+    def remove(self, ref_id):
+        with self.lock:
+            self._remove(ref_id)
+
+    def _remove(self, ref_id):
+        name = self.names.pop(ref_id, None)
+        if name is None:
+            return
+        for key in self.keys(name):
+            position = bisect_left(self.entries, (key, ref_id))
+            if position < len(self.entries) and self.entries[position] == (key, ref_id):
+                del self.entries[position]
+
+    def search(self, prefix, limit=10):
+        """[{'id', 'name'}] of up to `limit` names with a word starting with `prefix`."""
+        prefix = ' '.join(prefix.casefold().split())
+        if not prefix:
+            return []
+        found = {}
+        with self.lock:
+            position = bisect_left(self.entries, (prefix,))
+            while position < len(self.entries) and len(found) < limit:
+                key, ref_id = self.entries[position]
+                if not key.startswith(prefix):
+                    break
+                found.setdefault(ref_id, self.names[ref_id])
+                position += 1
+        return [{'id': ref_id, 'name': name} for ref_id, name in found.items()]
+
+
+class AutocompleteState:
+    # One per app, in app.extensions['autocomplete'].
+    def __init__(self, refresh):
+        self.indexes = {kind: PrefixIndex() for kind in KINDS}
+        self.refresh = refresh
+        self.loaded_at = None
+        self.next_load = 0.0
+        # Held by whichever thread is loading, so only one ever does.
+        self.loading = threading.Lock()
+
+    def stale(self):
+        return time.monotonic() >= self.next_load
+
+
+class Autocomplete:
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['autocomplete'] = AutocompleteState(app.config.get('AUTOCOMPLETE_REFRESH', 300))
+        app.before_request(self.refresh)
+
+    @property
+    def state(self):
+        return current_app.extensions['autocomplete']
+
+    def refresh(self):
+        """Reload the indexes in the background if they are due and no reload is running."""
+        state = self.state
+        if state.stale() and state.loading.acquire(blocking=False):
+            app = current_app._get_current_object()
+            threading.Thread(target=self._reload, args=(app,), name='fyyur-autocomplete', daemon=True).start()
+
+    def _reload(self, app):
+        state = app.extensions['autocomplete']
+        try:
+            with app.app_context():
+                self.load()
+        except SQLAlchemyError as e:
+            # e.g. no schema yet; tried again after AUTOCOMPLETE_REFRESH.
+            state.next_load = time.monotonic() + state.refresh
+            app.logger.warning(f'autocomplete not loaded: {e}')
+        finally:
+            state.loading.release()
+
+    def load(self):
+        state = self.state
+        for kind, model in KINDS.items():
+            state.indexes[kind].reset(db.session.query(model.id, model.name))
+        state.loaded_at = time.monotonic()
+        state.next_load = state.loaded_at + state.refresh
+
+    def search(self, kind, prefix, limit=10):
+        # Stale indexes keep answering while the request hook reloads them;
+        # only before the first load is there nothing to answer from.
+        state = self.state
+        if state.loaded_at is None:
+            with state.loading:
+                if state.loaded_at is None:
+                    self.load()
+        return state.indexes[kind].search(prefix, limit)
+
+    def add(self, kind, ref_id, name):
+        self.state.indexes[kind].add(ref_id, name)
+
+    def remove(self, kind, ref_id):
+        self.state.indexes[kind].remove(ref_id)
+
+
+autocomplete = Autocomplete()
@@ -0,0 +1,131 @@
+from collections import defaultdict
+from datetime import timedelta
+from models import Show, db
+from summary import SHOW_COLUMNS
+
+#----------------------------------------------------------------------------#
+# Availability.
+#----------------------------------------------------------------------------#
+# A show occupies [created_time, created_time + duration_minutes). The
+# database refuses overlapping shows for the same venue or artist (exclusion
+# constraints from the "add show durations" migration); this module answers
+# "what is booked / free between two times" for the pages and the API.
+#
+# Only shows that can reach into the requested window are read: durations
+# are capped at MAX_DURATION, so the (venue_id|artist_id, created_time)
+# indexes bound the scan however many past shows a venue has.
+
+DEFAULT_DURATION = 120
+MAX_DURATION = 24 * 60
+
+
+class IntervalTree:
+    # Centered interval tree over half-open (start, end, key) intervals.
+    def __init__(self, intervals):
+        self.root = self._build(list(intervals))
+
+    def _build(self, intervals):
+        if not intervals:
+            return None
+        center = sorted(start for start, _, _ in intervals)[len(intervals) // 2]
+        left, here, right = [], [], []
+        for interval in intervals:
+            if interval[1] <= center and interval[0] < center:
+                left.append(interval)
+            elif interval[0] > center:
+                right.append(interval)
+            else:
+                here.append(interval)
+        return (center,
+                sorted(here, key=lambda interval: interval[0]),
+                sorted(here, key=lambda interval: interval[1], reverse=True),
+                self._build(left),
+                self._build(right))
+
+    def overlapping(self, start, end):
+        """Intervals overlapping [start, end), ordered by start."""
+        found = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            center, by_start, by_end, left, right = node
+            if end <= center:
+                # Everything here reaches past `center`, so only the start matters.
+                for interval in by_start:
+                    if interval[0] >= end:
+                        break
+                    found.append(interval)
+                stack.append(left)
+            elif start >= center:
+                for interval in by_end:
+                    if interval[1] <= start:
+                        break
+                    found.append(interval)
+                stack.append(right)
+            else:
+                found.extend(by_start)
+                stack.extend((left, right))
+        return sorted(found)
+
+
+def bookings(column, ref_id, start, end):
+    rows = db.session.query(Show.id, Show.created_time, Show.duration_minutes).filter(
+        column == ref_id,
+        Show.created_time < end,
+        Show.created_time > start - timedelta(minutes=MAX_DURATION)
+    )
+    return IntervalTree(
+        (row.created_time, row.created_time + timedelta(minutes=row.duration_minutes), row.id)
+        for row in rows)
+
+
+def bookings_for(column, ref_ids, start, end):
+    # bookings() for many venues or artists at once, in a single query.
+    rows = db.session.query(column.label('ref_id'), Show.id, Show.created_time, Show.duration_minutes).filter(
+        column.in_(ref_ids),
+        Show.created_time < end,
+        Show.created_time > start - timedelta(minutes=MAX_DURATION)
+    )
+    intervals = defaultdict(list)
+    for row in rows:
+        intervals[row.ref_id].append(
+            (row.created_time, row.created_time + timedelta(minutes=row.duration_minutes), row.id))
+    return {ref_id: IntervalTree(intervals[ref_id]) for ref_id in ref_ids}
+
+
+def free_slots(busy, start, end, minutes):
+    # Gaps of at least `minutes` between the (sorted) busy intervals.
+    length = timedelta(minutes=minutes)
+    free = []
+    cursor = start
+    for busy_start, busy_end, _ in busy:
+        if busy_start - cursor >= length:
+            free.append((cursor, busy_start))
+        cursor = max(cursor, busy_end)
+    if end - cursor >= length:
+        free.append((cursor, end))
+    return free
+
+
+def availability(model, ref_id, start, end, minutes=DEFAULT_DURATION):
+    busy = bookings(SHOW_COLUMNS[model], ref_id, start, end).overlapping(start, end)
+    return {
+        'from': start,
+        'to': end,
+        'duration_minutes': minutes,
+        'busy': [{'show_id': key, 'start': busy_start, 'end': busy_end}
+                 for busy_start, busy_end, key in busy],
+        'free': [{'start': free_start, 'end': free_end}
+                 for free_start, free_end in free_slots(busy, start, end, minutes)]
+    }
+
+
+def conflicts(artist_id, venue_id, start, minutes):
+    """Ids of the artist's and the venue's shows overlapping a new booking."""
+    end = start + timedelta(minutes=minutes)
+    return (
+        [key for _, _, key in bookings(Show.artist_id, artist_id, start, end).overlapping(start, end)],
+        [key for _, _, key in bookings(Show.venue_id, venue_id, start, end).overlapping(start, end)]
+    )
@@ -0,0 +1,568 @@
+"""Route benchmarks.
+
+Runs every page of the app through the test client against the configured
+database (seed it first with `flask fyyur seed`), and records latency
+percentiles and query counts per route as JSON so runs on different commits
+can be compared:
+
+    python benchmark.py --output before.json
+    python benchmark.py --output after.json --compare before.json
+
+To measure archiving on a large history (PostgreSQL):
+
+    flask fyyur seed --past-shows 10000000
+    python benchmark.py --output history.json
+    flask fyyur archive-shows
+    python benchmark.py --compare history.json
+
+The response cache is cleared before every request, so the numbers measure
+the database path. A separate render benchmark times the shows template over
+--render-shows synthetic rows without touching the database, and the startup
+benchmark boots the app in fresh interpreters: `python -X importtime -c
+"import wsgi"` for the import cost (and its heaviest imports), and process
+start to the first response from / for a cold boot.
+
+With --explain (PostgreSQL), every SELECT a route runs is captured with its
+parameters and EXPLAINed with enable_seqscan off, so the planner only keeps a
+Seq Scan when no index can serve the statement. A Seq Scan with a Filter is
+reported with its route and statement, and fails the run; unfiltered ones are
+whole-table reads (/artists, /venues) that no index would make cheaper.
+
+--venue-scaling adds 10, 100, ... 100000 synthetic venues (or the counts
+given) and checks that /venues runs the same number of queries at every size:
+a count that grows with the venues is an N+1. The added venues are deleted
+afterwards.
+
+--import-rows N times importer.import_rows over N synthetic artist rows,
+given as CSV cells the way `flask fyyur import` reads them, and reports
+rows/s against --import-target. The default target, 4000 rows/s, is set just
+below the measured rate: rows are validated with the create page forms, and
+that, not the batched insert, bounds the import at about 5-6k rows/s per
+process. The imported artists are deleted afterwards.
+
+--search-rows N adds N synthetic artists (1000000 for the 20ms goal) and
+times artist name search for an exact name, a prefix and a term matching
+nothing, failing if a p99 exceeds --search-target-ms (20). A term matching
+thousands of names is reported but not gated: the results page lists every
+match, so its time is set by their number. On SQLite the first search also
+builds the in-memory trigram index, and is reported on its own. The added
+artists are deleted afterwards.
+
+--clients N measures connection pool contention: N threads (e.g. 200) each
+send --client-requests requests round the routes at once. A pool `checkout`
+listener times each request's wait for its first connection, compared with
+a single client sending the same requests, and the peak checked-out and
+overflow connections (the gauges on /metrics) are sampled meanwhile. Requests
+failing under the load (e.g. on pool_timeout) fail the run.
+
+Exits non-zero if a route errors, plans a filtered Seq Scan with --explain,
+changes its query count with --venue-scaling, imports slower than
+--import-target, searches slower than --search-target-ms or, with --compare,
+regresses.
+"""
+import argparse
+import json
+import math
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import render_template
+from sqlalchemy import event
+
+from importer import import_rows
+from models import Venue, Artist, db
+from queries import search_results
+from seed import CITIES, WORDS, insert
+from wsgi import app
+
+
+def routes():
+    with app.app_context():
+        venue_id = db.session.query(db.func.min(Venue.id)).scalar() or 1
+        artist_id = db.session.query(db.func.min(Artist.id)).scalar() or 1
+    return [
+        ('index', 'GET', '/', None),
+        ('venues', 'GET', '/venues', None),
+        ('artists', 'GET', '/artists', None),
+        ('shows', 'GET', '/shows', None),
+        ('show_venue', 'GET', f'/venues/{venue_id}', None),
+        ('show_artist', 'GET', f'/artists/{artist_id}', None),
+        ('search_venues', 'POST', '/venues/search', {'search_term': 'room'}),
+        ('search_artists', 'POST', '/artists/search', {'search_term': 'blue'}),
+        ('search_show', 'POST', '/shows/search', {'search_term': 'blue', 'filter_by': 'artist'}),
+        ('autocomplete', 'GET', '/autocomplete?type=venue&q=the', None),
+        ('api_venues', 'GET', '/api/v1/venues', None),
+        ('api_show_venue', 'GET', f'/api/v1/venues/{venue_id}', None)
+    ]
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def run(requests):
+    client = app.test_client()
+    cache = app.extensions['cache']
+    profiler = app.extensions['profiler']
+    results = {}
+    failed = False
+    for name, method, path, data in routes():
+        timings = []
+        queries = []
+        for _ in range(requests):
+            cache.clear()
+            start = time.perf_counter()
+            response = client.open(path, method=method, data=data)
+            timings.append((time.perf_counter() - start) * 1000)
+            queries.append(len(profiler.recent[0]['queries']) if profiler.recent else 0)
+            if response.status_code >= 500:
+                failed = True
+        results[name] = {
+            'p50_ms': round(statistics.median(timings), 3),
+            'p99_ms': round(percentile(timings, 0.99), 3),
+            'mean_ms': round(statistics.fmean(timings), 3),
+            'queries': max(queries)
+        }
+        print(f"{name:16} p50 {results[name]['p50_ms']:8.2f}ms  p99 {results[name]['p99_ms']:8.2f}ms  "
+              f"{results[name]['queries']} queries")
+    return results, failed
+
+
+def plan_nodes(node):
+    yield node
+    for child in node.get('Plans', ()):
+        yield from plan_nodes(child)
+
+
+def seq_scans(engine, statements):
+    # [(table, filter, statement)] for every Seq Scan left in the plans of
+    # `statements` that filters its rows. An unfiltered one reads the whole
+    # table because the statement wants all of it (/artists lists every
+    # artist, /venues every venue in area order), which no index makes
+    # cheaper; a filtered one means no index serves the predicate.
+    found = []
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute('SET LOCAL enable_seqscan = off')
+        for statement, parameters in statements.items():
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {statement}', parameters)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            found.extend((node['Relation Name'], node['Filter'], statement)
+                         for node in plan_nodes(plan[0]['Plan'])
+                         if node['Node Type'] == 'Seq Scan' and 'Filter' in node)
+        connection.rollback()
+    finally:
+        connection.close()
+    return found
+
+
+def explain():
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'postgresql':
+        print('explain          skipped: needs PostgreSQL')
+        return {}, False
+
+    statements = {}
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            statements.setdefault(statement, parameters)
+
+    client = app.test_client()
+    cache = app.extensions['cache']
+    results = {}
+    event.listen(engine, 'before_cursor_execute', capture)
+    try:
+        for name, method, path, data in routes():
+            statements.clear()
+            cache.clear()
+            client.open(path, method=method, data=data)
+            scans = seq_scans(engine, dict(statements))
+            results[name] = [f'{table} ({where}): {" ".join(statement.split())}'
+                             for table, where, statement in scans]
+            print(f"{name:16} explain {len(statements)} statements, {len(scans)} filtered seq scans")
+            for scan in results[name]:
+                print(f'{"":16}   Seq Scan on {scan}')
+    finally:
+        event.remove(engine, 'before_cursor_execute', capture)
+    return results, any(results.values())
+
+
+VENUE_SCALING = [10, 100, 1000, 10000, 100000]
+
+
+def venue_scaling(counts):
+    client = app.test_client()
+    cache = app.extensions['cache']
+    profiler = app.extensions['profiler']
+    table = Venue.__table__
+    with app.app_context():
+        first_id = (db.session.query(db.func.max(Venue.id)).scalar() or 0) + 1
+    results = {}
+    added = 0
+    try:
+        for count in sorted(counts):
+            with app.app_context():
+                insert(Venue, [{'name': f'Scaling Venue {i}', 'city': 'Austin', 'state': 'TX'}
+                               for i in range(added, count)])
+            added = count
+            cache.clear()
+            start = time.perf_counter()
+            response = client.get('/venues')
+            results[count] = {
+                'ms': round((time.perf_counter() - start) * 1000, 3),
+                'queries': len(profiler.recent[0]['queries']),
+                'status': response.status_code
+            }
+            print(f"{'venues':16} +{count:<7} {results[count]['ms']:10.2f}ms  "
+                  f"{results[count]['queries']} queries")
+    finally:
+        with app.app_context():
+            db.session.execute(table.delete().where(table.c.id >= first_id))
+            db.session.commit()
+    failed = (len({result['queries'] for result in results.values()}) > 1 or
+              any(result['status'] >= 500 for result in results.values()))
+    if failed:
+        print('REGRESSION /venues query count depends on the number of venues')
+    return results, failed
+
+
+SEARCH_TARGET_MS = 20
+
+
+def search_name(i):
+    return f'{WORDS[i % len(WORDS)]} {WORDS[i // len(WORDS) % len(WORDS)]} {i}'
+
+
+def search_latency(count, target_ms, requests):
+    # Artist search over `count` added artists named like the seeded ones.
+    # An exact name, a prefix and no match are held to `target_ms`; a common
+    # word pair, matching thousands of names, is only reported, as search
+    # pages list every match and its time grows with them.
+    terms = {search_name(count // 2): True, 'velvet echo 12': True, 'no such artist': True,
+             'static lan': False}
+    table = Artist.__table__
+    with app.app_context():
+        first_id = (db.session.query(db.func.max(Artist.id)).scalar() or 0) + 1
+    results = {}
+    try:
+        with app.app_context():
+            insert(Artist, [{'name': search_name(i), 'city': 'Austin', 'state': 'TX'} for i in range(count)])
+            # The first search on SQLite builds the in-memory index.
+            start = time.perf_counter()
+            search_results(Artist, 'no such artist')
+            results['first_ms'] = round((time.perf_counter() - start) * 1000, 3)
+            print(f"{'search':16} first search {results['first_ms']:10.2f}ms")
+            for term, gated in terms.items():
+                timings = []
+                for _ in range(requests):
+                    start = time.perf_counter()
+                    found = search_results(Artist, term)
+                    timings.append((time.perf_counter() - start) * 1000)
+                results[term] = {
+                    'p50_ms': round(statistics.median(timings), 3),
+                    'p99_ms': round(percentile(timings, 0.99), 3),
+                    'count': found['count'],
+                    'gated': gated
+                }
+                print(f"{'search':16} {term!r:24} p50 {results[term]['p50_ms']:8.2f}ms  "
+                      f"p99 {results[term]['p99_ms']:8.2f}ms  {found['count']} hits in {count} artists"
+                      f"{'' if gated else ' (not gated)'}")
+    finally:
+        with app.app_context():
+            db.session.execute(table.delete().where(table.c.id >= first_id))
+            db.session.commit()
+    failed = any(results[term]['p99_ms'] > target_ms for term, gated in terms.items() if gated)
+    if failed:
+        print(f'REGRESSION artist search p99 above {target_ms}ms')
+    return results, failed
+
+
+IMPORT_TARGET = 4000
+
+
+def import_throughput(count, target):
+    rows = [{
+        'name': f'Import Artist {i}',
+        'city': CITIES[i % len(CITIES)][0],
+        'state': CITIES[i % len(CITIES)][1],
+        'phone': '512-555-0100',
+        'genres': 'Jazz,Blues',
+        'facebook_link': f'https://www.facebook.com/importartist{i}',
+        'seeking_venue': 'true' if i % 2 else 'false'
+    } for i in range(count)]
+    table = Artist.__table__
+    with app.app_context():
+        first_id = (db.session.query(db.func.max(Artist.id)).scalar() or 0) + 1
+        try:
+            start = time.perf_counter()
+            imported, errors = import_rows('artists', rows)
+            elapsed = time.perf_counter() - start
+        finally:
+            db.session.rollback()
+            db.session.execute(table.delete().where(table.c.id >= first_id))
+            db.session.commit()
+    result = {
+        'rows': count,
+        'imported': imported,
+        'seconds': round(elapsed, 3),
+        'rows_per_second': round(imported / elapsed)
+    }
+    print(f"{'import_rows':16} {result['rows_per_second']:>8} rows/s  {imported} of {count} rows "
+          f"in {elapsed:.2f}s (target {target} rows/s)")
+    for row_number, error in errors[:5]:
+        print(f'{"":16}   row {row_number}: {error}')
+    failed = bool(errors) or result['rows_per_second'] < target
+    return result, failed
+
+
+def connection_waits(engine, clients, requests):
+    # Seconds from the start of each request to its first pooled connection,
+    # and the peak pool gauges, with `clients` threads sending requests at once.
+    pool = engine.pool
+    paths = routes()
+    cache = app.extensions['cache']
+    local = threading.local()
+    waits = []
+    errors = []
+    peak = {'checked_out': 0, 'overflow': 0}
+    done = threading.Event()
+
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        start = getattr(local, 'start', None)
+        if start is not None:
+            waits.append(time.perf_counter() - start)
+            local.start = None
+
+    def sample():
+        while not done.wait(0.005):
+            peak['checked_out'] = max(peak['checked_out'], pool.checkedout())
+            # overflow() counts up from -pool_size.
+            peak['overflow'] = max(peak['overflow'], pool.overflow())
+
+    def client():
+        test_client = app.test_client()
+        for i in range(requests):
+            name, method, path, data = paths[i % len(paths)]
+            cache.clear()
+            local.start = time.perf_counter()
+            if test_client.open(path, method=method, data=data).status_code >= 500:
+                errors.append(name)
+            local.start = None
+
+    event.listen(engine, 'checkout', checkout)
+    sampler = threading.Thread(target=sample)
+    sampler.start()
+    try:
+        threads = [threading.Thread(target=client) for _ in range(clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        done.set()
+        sampler.join()
+        event.remove(engine, 'checkout', checkout)
+    return waits, peak, errors
+
+
+def pool_wait(clients, requests):
+    with app.app_context():
+        engine = db.engine
+    if not hasattr(engine.pool, 'checkedout'):
+        print(f'pool_wait        skipped: {type(engine.pool).__name__} has no queue')
+        return {}, False
+
+    alone, _, _ = connection_waits(engine, 1, requests)
+    waits, peak, errors = connection_waits(engine, clients, requests)
+    baseline = statistics.median(alone) if alone else 0.0
+    result = {
+        'clients': clients,
+        'pool_size': engine.pool.size(),
+        'baseline_ms': round(baseline * 1000, 3),
+        'p50_wait_ms': round(max(0.0, statistics.median(waits) - baseline) * 1000, 3),
+        'p99_wait_ms': round(max(0.0, percentile(waits, 0.99) - baseline) * 1000, 3),
+        'peak_checked_out': peak['checked_out'],
+        'peak_overflow': peak['overflow'],
+        'errors': len(errors)
+    }
+    print(f"{'pool_wait':16} p50 {result['p50_wait_ms']:8.2f}ms  p99 {result['p99_wait_ms']:8.2f}ms  "
+          f"{clients} clients, {peak['checked_out']} of {result['pool_size']} connections "
+          f"(+{peak['overflow']} overflow), {len(errors)} errors")
+    return result, bool(errors)
+
+
+def render(count, requests):
+    # Times the show tile loop (and its datetime filter) on its own.
+    start_time = datetime(2030, 1, 1, 20)
+    shows = [{
+        'venue_id': i % 200 + 1,
+        'venue_name': f'Venue {i % 200}',
+        'artist_id': i % 1000 + 1,
+        'artist_name': f'Artist {i % 1000}',
+        'artist_image_link': f'https://example.com/{i % 1000}.jpg',
+        'start_time': start_time + timedelta(hours=i)
+    } for i in range(count)]
+    timings = []
+    with app.test_request_context('/shows'):
+        for _ in range(max(requests // 10, 3)):
+            start = time.perf_counter()
+            render_template('pages/shows.html', shows=shows, next_cursor=None, limit=count)
+            timings.append((time.perf_counter() - start) * 1000)
+    result = {
+        'shows': count,
+        'p50_ms': round(statistics.median(timings), 3),
+        'p99_ms': round(percentile(timings, 0.99), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'queries': 0
+    }
+    print(f"{'render_shows':16} p50 {result['p50_ms']:8.2f}ms  p99 {result['p99_ms']:8.2f}ms  "
+          f"{count} shows")
+    return result
+
+
+# Run in a fresh interpreter: import the app and serve one request.
+BOOT_SCRIPT = '''
+from wsgi import app
+print(app.test_client().get('/').status_code)
+'''
+
+
+def import_times():
+    # -X importtime writes "import time: self [us] | cumulative | name" to
+    # stderr, children before their parent and indented one level deeper.
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import wsgi'],
+                             capture_output=True, text=True, env=boot_env())
+    children = []
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        if level == 1:
+            children.append((int(cumulative) / 1000, name.strip()))
+        elif level == 0:
+            if name.strip() == 'wsgi':
+                return int(cumulative) / 1000, sorted(children, reverse=True)
+            children = []
+    raise RuntimeError(f'importing app failed:\n{process.stderr[-2000:]}')
+
+
+def boot_env():
+    env = dict(os.environ)
+    here = os.path.dirname(os.path.abspath(__file__))
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [here, env.get('PYTHONPATH')]))
+    return env
+
+
+def startup(runs):
+    imports = []
+    timings = []
+    failed = False
+    for _ in range(runs):
+        total, children = import_times()
+        imports.append(total)
+        start = time.perf_counter()
+        process = subprocess.run([sys.executable, '-c', BOOT_SCRIPT], capture_output=True,
+                                 text=True, env=boot_env())
+        timings.append((time.perf_counter() - start) * 1000)
+        if process.returncode or int(process.stdout.split()[-1]) >= 500:
+            failed = True
+    result = {
+        'import_ms': round(statistics.median(imports), 3),
+        'slowest_imports': {name: round(ms, 3) for ms, name in children[:10]},
+        'p50_ms': round(statistics.median(timings), 3),
+        'p99_ms': round(percentile(timings, 0.99), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'queries': 0
+    }
+    print(f"{'startup':16} p50 {result['p50_ms']:8.2f}ms  p99 {result['p99_ms']:8.2f}ms  "
+          f"import {result['import_ms']:.2f}ms")
+    for name, ms in result['slowest_imports'].items():
+        print(f'{"":16}   {ms:8.2f}ms  {name}')
+    return result, failed
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, old in baseline['routes'].items():
+        new = results.get(name)
+        if new is None:
+            continue
+        for key in ('p50_ms', 'p99_ms'):
+            if new[key] > old[key] * (1 + tolerance):
+                regressions.append(f'{name} {key}: {old[key]:.2f} -> {new[key]:.2f}')
+        if new['queries'] > old['queries']:
+            regressions.append(f"{name} queries: {old['queries']} -> {new['queries']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=50, help='requests per route')
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--compare', help='baseline JSON file to compare against')
+    parser.add_argument('--render-shows', type=int, default=10000, help='shows in the render benchmark')
+    parser.add_argument('--startup-runs', type=int, default=5, help='cold boots in the startup benchmark')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed latency increase (0.2 = 20%%)')
+    parser.add_argument('--explain', action='store_true', help='fail on route statements planned as a filtered Seq Scan')
+    parser.add_argument('--venue-scaling', type=int, nargs='*', metavar='COUNT',
+                        help=f'check the /venues query count with this many added venues (default {VENUE_SCALING})')
+    parser.add_argument('--import-rows', type=int, default=0, help='artist rows in the import benchmark')
+    parser.add_argument('--import-target', type=int, default=IMPORT_TARGET, help='minimum import rows per second')
+    parser.add_argument('--search-rows', type=int, default=0, help='artists added for the search latency benchmark')
+    parser.add_argument('--search-target-ms', type=float, default=SEARCH_TARGET_MS, help='maximum search p99 in ms')
+    parser.add_argument('--clients', type=int, default=0, help='concurrent clients in the pool wait benchmark')
+    parser.add_argument('--client-requests', type=int, default=10, help='requests per client in the pool wait benchmark')
+    args = parser.parse_args()
+
+    results, failed = run(args.requests)
+    results['render_shows'] = render(args.render_shows, args.requests)
+    results['startup'], startup_failed = startup(args.startup_runs)
+    failed = failed or startup_failed
+    report = {
+        'commit': subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                 text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip(),
+        'created': datetime.now().isoformat(),
+        'requests': args.requests,
+        'routes': results
+    }
+    if args.explain:
+        report['seq_scans'], explain_failed = explain()
+        failed = failed or explain_failed
+    if args.venue_scaling is not None:
+        report['venue_scaling'], scaling_failed = venue_scaling(args.venue_scaling or VENUE_SCALING)
+        failed = failed or scaling_failed
+    if args.import_rows:
+        report['import'], import_failed = import_throughput(args.import_rows, args.import_target)
+        failed = failed or import_failed
+    if args.search_rows:
+        report['search'], search_failed = search_latency(args.search_rows, args.search_target_ms, args.requests)
+        failed = failed or search_failed
+    if args.clients:
+        report['pool_wait'], pool_failed = pool_wait(args.clients, args.client_requests)
+        failed = failed or pool_failed
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        failed = failed or bool(regressions)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from jinja2 import nodes
+from jinja2.ext import Extension
+
+#----------------------------------------------------------------------------#
+# Cache backends.
+#----------------------------------------------------------------------------#
+
+class MemoryBackend:
+    # Per-process LRU with a TTL on every entry.
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisBackend:
+    # Shared between workers; needs the optional `redis` package.
+    def __init__(self, url, prefix='fyyur:'):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return None if value is None else pickle.loads(value)
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=ttl)
+
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*[self.prefix + key for key in keys])
+
+    def clear(self):
+        keys = list(self.client.scan_iter(self.prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+
+#----------------------------------------------------------------------------#
+# Cache.
+#----------------------------------------------------------------------------#
+# Rendered template fragments live beside the data under 'fragment:<key>', so
+# deleting a data key (e.g. 'venue:3' after an edit) drops the fragment built
+# from it as well.
+
+FRAGMENT_PREFIX = 'fragment:'
+
+class CacheState:
+    # One per app, in app.extensions['cache'].
+    def __init__(self, backend, ttl):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # The counters are bumped from request and query pool threads alike.
+        self.lock = threading.Lock()
+
+    def get_or_set(self, key, build, ttl=None):
+        # `None` results (e.g. a missing record) are never stored.
+        value = self.backend.get(key)
+        with self.lock:
+            if value is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if value is not None:
+            return value
+        value = build()
+        if value is not None:
+            self.backend.set(key, value, ttl or self.ttl)
+        return value
+
+    def delete(self, *keys):
+        self.backend.delete(*keys, *(FRAGMENT_PREFIX + key for key in keys))
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        with self.lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            'backend': type(self.backend).__name__,
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': hits / lookups if lookups else 0.0
+        }
+
+
+class Cache:
+    # Module-level handle; every call goes to the current app's CacheState,
+    # so apps built with different configs don't share a backend.
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if app.config.get('CACHE_BACKEND', 'memory') == 'redis':
+            backend = RedisBackend(app.config.get('CACHE_REDIS_URL', 'redis://localhost:6379/0'))
+        else:
+            backend = MemoryBackend(app.config.get('CACHE_MAX_ENTRIES', 1024))
+        state = app.extensions['cache'] = CacheState(backend, app.config.get('CACHE_TTL', 300))
+        app.jinja_env.add_extension(FragmentCacheExtension)
+        app.jinja_env.fragment_cache = state
+
+    @property
+    def state(self):
+        return current_app.extensions['cache']
+
+    def get_or_set(self, key, build, ttl=None):
+        return self.state.get_or_set(key, build, ttl)
+
+    def delete(self, *keys):
+        self.state.delete(*keys)
+
+    def clear(self):
+        self.state.clear()
+
+    def stats(self):
+        return self.state.stats()
+
+
+class FragmentCacheExtension(Extension):
+    # {% cache key[, ttl] %}...{% endcache %} renders the block once and
+    # reuses the markup until `key` is deleted or the ttl runs out. Blank
+    # output (e.g. a listing rendered after its query failed) is not stored.
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        if parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        else:
+            args.append(nodes.Const(None))
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render', args), [], [], body).set_lineno(lineno)
+
+    def _render(self, key, ttl, caller):
+        if self.environment.fragment_cache is None:
+            return caller()
+        def render():
+            markup = caller()
+            return markup if markup.strip() else None
+        return self.environment.fragment_cache.get_or_set(FRAGMENT_PREFIX + str(key), render, ttl) or ''
+
+
+cache = Cache()
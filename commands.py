@@ -0,0 +1,128 @@
+import click
+from datetime import datetime, timedelta
+from flask import current_app
+from flask.cli import AppGroup
+from models import Venue, Artist, db
+from summary import roll_forward, check_summaries, rebuild_summaries
+from importer import KINDS, read_rows, import_rows
+from cache import cache
+from seed import generate, generate_past_shows
+from templating import precompile
+from assets import build
+from archive import archive_shows, detach_partitions
+
+#----------------------------------------------------------------------------#
+# CLI.
+#----------------------------------------------------------------------------#
+
+fyyur_cli = AppGroup('fyyur', help='Fyyur maintenance commands.')
+
+
+@fyyur_cli.command('create-schema')
+def create_schema_command():
+    """Create missing tables, then apply the migrations.
+
+    The migrations only add PostgreSQL extensions, indexes and constraints on
+    top of the tables, so on other databases only the tables are created.
+    """
+    db.create_all()
+    if db.engine.dialect.name == 'postgresql':
+        from flask_migrate import upgrade
+        upgrade()
+    click.echo('schema up to date')
+
+
+@fyyur_cli.command('roll-summaries')
+def roll_summaries_command():
+    """Move started shows from the upcoming to the past counts.
+
+    Run it periodically (e.g. every few minutes from cron).
+    """
+    click.echo(f'{roll_forward()} summaries rolled forward')
+
+
+@fyyur_cli.command('check-summaries')
+@click.option('--rebuild', is_flag=True, help='Recompute every summary from scratch.')
+def check_summaries_command(rebuild):
+    """Compare the stored show summaries with the shows table."""
+    for model in (Venue, Artist):
+        ids = check_summaries(model)
+        click.echo(f'{model.__name__}: {len(ids)} inconsistent' + (f' {ids[:20]}' if ids else ''))
+    if rebuild:
+        click.echo(f'{rebuild_summaries()} summaries rebuilt')
+
+
+@fyyur_cli.command('archive-shows')
+@click.option('--days', type=int, help='Archive shows older than this. Defaults to SHOW_ARCHIVE_DAYS.')
+@click.option('--detach-before', type=click.DateTime(formats=['%Y-%m-%d']),
+              help='Then detach the history partitions of the months before this date.')
+def archive_shows_command(days, detach_before):
+    """Move old shows from `shows` into the partitioned show_history table.
+
+    Run it periodically (e.g. nightly from cron).
+    """
+    if days is None:
+        days = current_app.config.get('SHOW_ARCHIVE_DAYS', 90)
+    moved = archive_shows(datetime.now() - timedelta(days=days))
+    click.echo(f'{moved} shows archived')
+    if detach_before:
+        for name in detach_partitions(detach_before):
+            click.echo(f'{name} detached')
+    cache.clear()
+
+
+@fyyur_cli.command('import')
+@click.argument('kind', type=click.Choice(sorted(KINDS)))
+@click.argument('source', type=click.File('r', encoding='utf-8'))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']),
+              help='Defaults to the file extension.')
+@click.option('--batch-size', default=1000, show_default=True, help='Rows per insert.')
+def import_command(kind, source, fmt, batch_size):
+    """Bulk load artists, venues or shows from a CSV or NDJSON file.
+
+    Rows are validated like the create forms; invalid rows are reported
+    and skipped.
+    """
+    fmt = fmt or ('csv' if source.name.endswith('.csv') else 'ndjson')
+    imported, errors = import_rows(kind, read_rows(source, fmt), batch_size)
+    for row_number, error in errors:
+        click.echo(f'row {row_number}: {error}', err=True)
+    cache.clear()
+    click.echo(f'{imported} {kind} imported, {len(errors)} rejected')
+
+
+@fyyur_cli.command('seed')
+@click.option('--artists', default=1000, show_default=True)
+@click.option('--venues', default=200, show_default=True)
+@click.option('--shows', default=10000, show_default=True)
+@click.option('--seed', default=42, show_default=True, help='Same seed, same data.')
+@click.option('--past-shows', default=0, show_default=True,
+              help='Also add this many old shows (PostgreSQL only), e.g. to benchmark archiving.')
+def seed_command(artists, venues, shows, seed, past_shows):
+    """Fill the database with synthetic, realistically skewed data."""
+    created = generate(artists, venues, shows, seed)
+    if past_shows:
+        created += generate_past_shows(past_shows)
+    cache.clear()
+    click.echo(f'{artists} artists, {venues} venues and {created} shows created')
+
+
+@fyyur_cli.command('compile-templates')
+def compile_templates_command():
+    """Compile every template into the bytecode cache.
+
+    Run it as part of a deploy so new workers start with warm bytecode.
+    """
+    click.echo(f'{len(precompile(current_app))} templates compiled')
+
+
+@fyyur_cli.command('build-assets')
+def build_assets_command():
+    """Bundle, minify, fingerprint and precompress everything under static/."""
+    assets = current_app.extensions['assets']
+    try:
+        manifest = build(current_app.static_folder, assets.directory, assets.prefix)
+    except ValueError as e:
+        raise click.ClickException(f'{e} (set ASSETS_DIR to a directory under static/)')
+    assets.load()
+    click.echo(f'{len(manifest)} assets written to {assets.directory}')
@@ -1,4 +1,5 @@
 import os
+from sqlalchemy.pool import NullPool
 SECRET_KEY = os.urandom(32)
 # Grabs the folder where the script runs.
 basedir = os.path.abspath(os.path.dirname(__file__))
@@ -14,3 +15,68 @@ url='localhost:5432'
 # TODO IMPLEMENT DATABASE URL
 SQLALCHEMY_DATABASE_URI = f'postgresql://{uname}:{password}@{url}/{DBNAME}'
 SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+# Connection pool. Behind pgbouncer in transaction pooling mode set
+# DB_PGBOUNCER=true: pgbouncer owns the pool, so each checkout opens a fresh
+# (cheap) pgbouncer connection, and the statement timeout is applied per
+# transaction because pgbouncer rejects startup options.
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 10))
+DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 30000))
+DB_PGBOUNCER = os.environ.get('DB_PGBOUNCER', 'false').lower() == 'true'
+
+if DB_PGBOUNCER:
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'poolclass': NullPool
+    }
+else:
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,
+        'pool_recycle': DB_POOL_RECYCLE,
+        'pool_pre_ping': True,
+        'connect_args': {'options': f'-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}'}
+    }
+
+# Response cache: 'memory' keeps an LRU per worker process, 'redis' shares
+# one between workers (needs the `redis` package).
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+CACHE_TTL = int(os.environ.get('CACHE_TTL', 300))
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 1024))
+
+# Request profiler: requests slower than this are logged with their queries.
+PROFILE_SLOW_REQUEST_MS = int(os.environ.get('PROFILE_SLOW_REQUEST_MS', 500))
+# Serve the /debug/profile panel, which lists recent requests with their SQL.
+# Off unless asked for, debug mode included.
+PROFILE_PANEL = os.environ.get('PROFILE_PANEL', 'false').lower() == 'true'
+
+# Run independent queries within a handler concurrently on a thread pool
+# (see parallel.py). Each worker holds its own connection, so keep
+# DB_POOL_SIZE + DB_MAX_OVERFLOW above request threads * QUERY_WORKERS.
+CONCURRENT_QUERIES = os.environ.get('CONCURRENT_QUERIES', 'false').lower() == 'true'
+QUERY_WORKERS = int(os.environ.get('QUERY_WORKERS', 8))
+
+# Compiled templates are cached as bytecode here and every template is
+# compiled when the app starts, so workers never compile on a request.
+# `flask fyyur compile-templates` fills the cache ahead of a deploy. Unset,
+# Jinja's per-user directory (mode 0700, owner checked) is used; a directory
+# set here must belong to the app's user and be private to it.
+TEMPLATE_CACHE_DIR = os.environ.get('TEMPLATE_CACHE_DIR')
+TEMPLATE_PRECOMPILE = os.environ.get('TEMPLATE_PRECOMPILE', 'true').lower() == 'true'
+
+# Fingerprinted, precompressed static files built by `flask fyyur build-assets`
+# (see assets.py) and served under ASSETS_URL with immutable caching.
+ASSETS_DIR = os.environ.get('ASSETS_DIR', os.path.join(basedir, 'static', 'dist'))
+ASSETS_URL = os.environ.get('ASSETS_URL', '/assets')
+
+# Shows that started more than this many days ago are moved from `shows` into
+# the partitioned show_history table by `flask fyyur archive-shows`.
+SHOW_ARCHIVE_DAYS = int(os.environ.get('SHOW_ARCHIVE_DAYS', 90))
+
+# Name suggestions (see autocomplete.py) are answered from memory; each worker
+# reloads them this often to pick up other workers' changes.
+AUTOCOMPLETE_REFRESH = int(os.environ.get('AUTOCOMPLETE_REFRESH', 300))
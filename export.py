@@ -0,0 +1,88 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from models import Venue, Show, Artist, db
+
+#----------------------------------------------------------------------------#
+# Catalog export.
+#----------------------------------------------------------------------------#
+# Rows are read through a server-side cursor (yield_per) and encoded as they
+# arrive, so memory stays flat however large the table is.
+
+EXPORTS = {
+    'artists': Artist,
+    'venues': Venue,
+    'shows': Show
+}
+
+CHUNK_SIZE = 64 * 1024
+
+
+def export_rows(model, since=None, batch_size=1000):
+    query = db.session.query(*model.__table__.columns)
+    if since is not None:
+        query = query.filter(model.updated_at > since)
+    for row in query.order_by(model.id).yield_per(batch_size):
+        yield row._asdict()
+
+
+def json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, default=json_default) + '\n'
+
+
+def csv_lines(rows, fieldnames):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames)
+    writer.writeheader()
+    for row in rows:
+        for key, value in row.items():
+            if isinstance(value, list):
+                row[key] = ','.join(value)
+            elif isinstance(value, datetime):
+                row[key] = value.isoformat()
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def chunked(lines):
+    # Groups small lines into ~64KB chunks so each write is worth the syscall.
+    chunk = []
+    size = 0
+    for line in lines:
+        data = line.encode('utf-8')
+        chunk.append(data)
+        size += len(data)
+        if size >= CHUNK_SIZE:
+            yield b''.join(chunk)
+            chunk = []
+            size = 0
+    if chunk:
+        yield b''.join(chunk)
+
+
+def gzipped(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_stream(model, fmt, since=None):
+    rows = export_rows(model, since)
+    if fmt == 'csv':
+        return chunked(csv_lines(rows, [column.key for column in model.__table__.columns]))
+    return chunked(ndjson_lines(rows))
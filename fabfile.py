@@ -7,12 +7,22 @@ from fabric.contrib.console import confirm
 def test():
     with settings(warn_only=True):
         result = local(
-            "python test_tasks.py -v && python test_users.py -v", capture=True
+            "python -m pytest -q --benchmark-disable", capture=True
         )
     if result.failed and not confirm("Tests failed. Continue?"):
         abort("Aborted at user request.")
 
 
+def benchmark():
+    # Needs the configured (seeded) database; see benchmark.py.
+    with settings(warn_only=True):
+        result = local(
+            "python benchmark.py --requests 5", capture=True
+        )
+    if result.failed and not confirm("Benchmark failed. Continue?"):
+        abort("Aborted at user request.")
+
+
 def commit():
     message = raw_input("Enter a git commit message: ")
     local("git add . && git commit -am '{}'".format(message))
@@ -40,7 +50,7 @@ def heroku():
 
 def heroku_test():
     local(
-        "heroku run python test_tasks.py -v && heroku run python test_users.py -v"
+        "heroku run python benchmark.py --requests 5"
     )
 
 
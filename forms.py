@@ -1,8 +1,8 @@
 from datetime import datetime
 from flask_wtf import Form
 import re
-from wtforms import StringField, SelectField, SelectMultipleField, DateTimeField, BooleanField
-from wtforms.validators import DataRequired, AnyOf, URL, ValidationError
+from wtforms import StringField, SelectField, SelectMultipleField, DateTimeField, BooleanField, IntegerField, TextAreaField
+from wtforms.validators import DataRequired, AnyOf, URL, ValidationError, NumberRange, Optional
 
 def validate_phone(self, phone):
         us_phone_num = '^([0-9]{3})[-][0-9]{3}[-][0-9]{4}$'
@@ -10,6 +10,9 @@ def validate_phone(self, phone):
         if not match:
             raise ValidationError('Error, phone number must be in format xxx-xxx-xxxx')
 
+# Accepts the ISO 8601 `T` separator and times without seconds as well.
+START_TIME_FORMATS = ['%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%dT%H:%M']
+
 class ShowForm(Form):
     artist_id = StringField(
         'artist_id'
@@ -20,8 +23,20 @@ class ShowForm(Form):
     start_time = DateTimeField(
         'start_time',
         validators=[DataRequired()],
+        format=START_TIME_FORMATS,
         default= datetime.today()
     )
+    duration = IntegerField(
+        'duration',
+        validators=[Optional(), NumberRange(min=15, max=24 * 60)],
+        default=120
+    )
+
+class BulkShowForm(Form):
+    # One show per line: artist_id, venue_id, start_time[, duration]
+    shows = TextAreaField(
+        'shows', validators=[DataRequired()]
+    )
 
 class VenueForm(Form):
     name = StringField(
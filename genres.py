@@ -0,0 +1,58 @@
+import re
+from forms import VenueForm
+
+#----------------------------------------------------------------------------#
+# Genres.
+#----------------------------------------------------------------------------#
+# Genres are stored in their canonical spelling from the form choices, in
+# choice order and without duplicates, so array containment and the facet
+# counts see one value per genre. Common variants ("hip hop", "rnb", "rock &
+# roll") map onto the canonical name; anything unrecognised becomes "Other".
+
+GENRES = [value for value, _ in VenueForm.genres.kwargs['choices']]
+
+ALIASES = {
+    'alt': 'Alternative',
+    'indie': 'Alternative',
+    'alternativerock': 'Alternative',
+    'classicalmusic': 'Classical',
+    'countrymusic': 'Country',
+    'electronica': 'Electronic',
+    'edm': 'Electronic',
+    'dance': 'Electronic',
+    'hiphop': 'Hip-Hop',
+    'rap': 'Hip-Hop',
+    'metal': 'Heavy Metal',
+    'musical': 'Musical Theatre',
+    'musicals': 'Musical Theatre',
+    'musicaltheater': 'Musical Theatre',
+    'theatre': 'Musical Theatre',
+    'theater': 'Musical Theatre',
+    'punkrock': 'Punk',
+    'rb': 'R&B',
+    'randb': 'R&B',
+    'rnb': 'R&B',
+    'rhythmandblues': 'R&B',
+    'rock': 'Rock n Roll',
+    'rockroll': 'Rock n Roll',
+    'rocknroll': 'Rock n Roll',
+    'rockandroll': 'Rock n Roll',
+}
+
+
+def genre_key(value):
+    return re.sub(r'[^a-z0-9]', '', value.lower())
+
+
+LOOKUP = dict({genre_key(genre): genre for genre in GENRES}, **ALIASES)
+ORDER = {genre: position for position, genre in enumerate(GENRES)}
+
+
+def canonical_genre(value):
+    """The canonical spelling of `value`, or None if it is not a known genre."""
+    return LOOKUP.get(genre_key(value))
+
+
+def canonical_genres(values):
+    genres = {canonical_genre(value) or 'Other' for value in values if value.strip()}
+    return sorted(genres, key=ORDER.get)
@@ -0,0 +1,138 @@
+import math
+
+#----------------------------------------------------------------------------#
+# Offline geocoding.
+#----------------------------------------------------------------------------#
+# Venues only carry a city and state, so they are placed at the centre of
+# their city from this table; no geocoding service is called. Cities that
+# are not listed keep NULL coordinates and never appear in distance searches.
+
+CITY_COORDINATES = {
+    ('albuquerque', 'NM'): (35.0844, -106.6504),
+    ('anchorage', 'AK'): (61.2181, -149.9003),
+    ('atlanta', 'GA'): (33.7490, -84.3880),
+    ('austin', 'TX'): (30.2672, -97.7431),
+    ('baltimore', 'MD'): (39.2904, -76.6122),
+    ('birmingham', 'AL'): (33.5186, -86.8104),
+    ('boise', 'ID'): (43.6150, -116.2023),
+    ('boston', 'MA'): (42.3601, -71.0589),
+    ('buffalo', 'NY'): (42.8864, -78.8784),
+    ('burlington', 'VT'): (44.4759, -73.2121),
+    ('charleston', 'SC'): (32.7765, -79.9311),
+    ('charlotte', 'NC'): (35.2271, -80.8431),
+    ('chicago', 'IL'): (41.8781, -87.6298),
+    ('cincinnati', 'OH'): (39.1031, -84.5120),
+    ('cleveland', 'OH'): (41.4993, -81.6944),
+    ('columbus', 'OH'): (39.9612, -82.9988),
+    ('dallas', 'TX'): (32.7767, -96.7970),
+    ('denver', 'CO'): (39.7392, -104.9903),
+    ('des moines', 'IA'): (41.5868, -93.6250),
+    ('detroit', 'MI'): (42.3314, -83.0458),
+    ('el paso', 'TX'): (31.7619, -106.4850),
+    ('fort worth', 'TX'): (32.7555, -97.3308),
+    ('honolulu', 'HI'): (21.3069, -157.8583),
+    ('houston', 'TX'): (29.7604, -95.3698),
+    ('indianapolis', 'IN'): (39.7684, -86.1581),
+    ('jacksonville', 'FL'): (30.3322, -81.6557),
+    ('kansas city', 'MO'): (39.0997, -94.5786),
+    ('las vegas', 'NV'): (36.1699, -115.1398),
+    ('los angeles', 'CA'): (34.0522, -118.2437),
+    ('louisville', 'KY'): (38.2527, -85.7585),
+    ('madison', 'WI'): (43.0731, -89.4012),
+    ('memphis', 'TN'): (35.1495, -90.0490),
+    ('miami', 'FL'): (25.7617, -80.1918),
+    ('milwaukee', 'WI'): (43.0389, -87.9065),
+    ('minneapolis', 'MN'): (44.9778, -93.2650),
+    ('nashville', 'TN'): (36.1627, -86.7816),
+    ('new orleans', 'LA'): (29.9511, -90.0715),
+    ('new york', 'NY'): (40.7128, -74.0060),
+    ('brooklyn', 'NY'): (40.6782, -73.9442),
+    ('newark', 'NJ'): (40.7357, -74.1724),
+    ('oakland', 'CA'): (37.8044, -122.2712),
+    ('oklahoma city', 'OK'): (35.4676, -97.5164),
+    ('omaha', 'NE'): (41.2565, -95.9345),
+    ('orlando', 'FL'): (28.5383, -81.3792),
+    ('philadelphia', 'PA'): (39.9526, -75.1652),
+    ('phoenix', 'AZ'): (33.4484, -112.0740),
+    ('pittsburgh', 'PA'): (40.4406, -79.9959),
+    ('portland', 'ME'): (43.6591, -70.2568),
+    ('portland', 'OR'): (45.5152, -122.6784),
+    ('providence', 'RI'): (41.8240, -71.4128),
+    ('raleigh', 'NC'): (35.7796, -78.6382),
+    ('richmond', 'VA'): (37.5407, -77.4360),
+    ('sacramento', 'CA'): (38.5816, -121.4944),
+    ('salt lake city', 'UT'): (40.7608, -111.8910),
+    ('san antonio', 'TX'): (29.4241, -98.4936),
+    ('san diego', 'CA'): (32.7157, -117.1611),
+    ('san francisco', 'CA'): (37.7749, -122.4194),
+    ('san jose', 'CA'): (37.3382, -121.8863),
+    ('santa fe', 'NM'): (35.6870, -105.9378),
+    ('savannah', 'GA'): (32.0809, -81.0912),
+    ('seattle', 'WA'): (47.6062, -122.3321),
+    ('st. louis', 'MO'): (38.6270, -90.1994),
+    ('st louis', 'MO'): (38.6270, -90.1994),
+    ('tampa', 'FL'): (27.9506, -82.4572),
+    ('tucson', 'AZ'): (32.2226, -110.9747),
+    ('tulsa', 'OK'): (36.1540, -95.9928),
+    ('washington', 'DC'): (38.9072, -77.0369),
+}
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def geocode(city, state):
+    """(latitude, longitude) of the city, or (None, None) if it is unknown."""
+    key = (' '.join((city or '').lower().split()), (state or '').strip().upper())
+    return CITY_COORDINATES.get(key, (None, None))
+
+
+#----------------------------------------------------------------------------#
+# KD-tree.
+#----------------------------------------------------------------------------#
+# Used instead of the earthdistance GiST index on engines without it. Points
+# are stored on the unit sphere in 3D, where straight-line (chord) distance
+# grows with great-circle distance, so a radius search is a plain ball query.
+
+def to_xyz(lat, lng):
+    lat, lng = math.radians(lat), math.radians(lng)
+    return (math.cos(lat) * math.cos(lng), math.cos(lat) * math.sin(lng), math.sin(lat))
+
+
+class KDTree:
+    def __init__(self, points):
+        # `points` is an iterable of (key, latitude, longitude).
+        self.root = self._build([(to_xyz(lat, lng), key) for key, lat, lng in points], 0)
+
+    def _build(self, items, depth):
+        if not items:
+            return None
+        axis = depth % 3
+        items.sort(key=lambda item: item[0][axis])
+        middle = len(items) // 2
+        return (items[middle], axis,
+                self._build(items[:middle], depth + 1),
+                self._build(items[middle + 1:], depth + 1))
+
+    def within(self, lat, lng, radius_km):
+        """[(distance_km, key)] for every point within radius_km, nearest first."""
+        target = to_xyz(lat, lng)
+        angle = min(radius_km / EARTH_RADIUS_KM, math.pi)
+        chord = 2 * math.sin(angle / 2)
+        found = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            (point, key), axis, left, right = node
+            if math.dist(point, target) <= chord:
+                found.append((self._arc_km(point, target), key))
+            offset = target[axis] - point[axis]
+            stack.append(left if offset <= 0 else right)
+            if abs(offset) <= chord:
+                stack.append(right if offset <= 0 else left)
+        return sorted(found)
+
+    @staticmethod
+    def _arc_km(a, b):
+        return 2 * EARTH_RADIUS_KM * math.asin(min(math.dist(a, b) / 2, 1.0))
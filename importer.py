@@ -0,0 +1,212 @@
+import csv
+import json
+from sqlalchemy.exc import IntegrityError
+from werkzeug.datastructures import MultiDict
+from models import Venue, Show, Artist, db
+from forms import ShowForm, ArtistForm, VenueForm
+from summary import refresh_summaries
+from geo import geocode
+from genres import canonical_genre, canonical_genres
+from availability import DEFAULT_DURATION
+
+#----------------------------------------------------------------------------#
+# Bulk import.
+#----------------------------------------------------------------------------#
+# Rows are streamed from CSV or NDJSON, validated with the same forms as the
+# create pages, and inserted in batches with a single executemany per batch.
+# One form is bound per import and re-processed for every row: binding the
+# fields and their validators costs more than validating them.
+
+def artist_values(form):
+    return {
+        'name': form.name.data,
+        'city': form.city.data,
+        'state': form.state.data,
+        'phone': form.phone.data,
+        'genres': form.genres.data,
+        'image_link': form.image_link.data,
+        'facebook_link': form.facebook_link.data,
+        'website_link': form.website_link.data,
+        'seeking_venue': form.seeking_venue.data,
+        'seeking_desc': form.seeking_description.data
+    }
+
+
+def venue_values(form):
+    # Core inserts skip the ORM hook in models.py, so place the venue here.
+    latitude, longitude = geocode(form.city.data, form.state.data)
+    return {
+        'name': form.name.data,
+        'city': form.city.data,
+        'state': form.state.data,
+        'address': form.address.data,
+        'phone': form.phone.data,
+        'genres': form.genres.data,
+        'image_link': form.image_link.data,
+        'facebook_link': form.facebook_link.data,
+        'website_link': form.website_link.data,
+        'seeking_talent': form.seeking_talent.data,
+        'seeking_desc': form.seeking_description.data,
+        'latitude': latitude,
+        'longitude': longitude
+    }
+
+
+def show_values(form):
+    return {
+        'artist_id': int(form.artist_id.data),
+        'venue_id': int(form.venue_id.data),
+        'created_time': form.start_time.data,
+        'duration_minutes': form.duration.data or DEFAULT_DURATION
+    }
+
+
+KINDS = {
+    'artists': (Artist, ArtistForm, artist_values),
+    'venues': (Venue, VenueForm, venue_values),
+    'shows': (Show, ShowForm, show_values)
+}
+
+
+def read_rows(stream, fmt):
+    # Unparseable NDJSON lines are yielded as the error so numbering continues.
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+    else:
+        for line in stream:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError as e:
+                    yield e
+
+
+def to_formdata(row):
+    # CSV cells are strings: genres are comma separated and booleans are
+    # true/false. NDJSON rows may carry real lists and booleans. Genres are
+    # canonicalized first so spelling variants pass the form's choices; a
+    # genre with no canonical name raises ValueError.
+    data = MultiDict()
+    for key, value in row.items():
+        if key == 'genres' and isinstance(value, str):
+            value = value.split(',')
+        if key == 'genres' and isinstance(value, list):
+            value = [str(genre) for genre in value]
+            unknown = [genre.strip() for genre in value if genre.strip() and canonical_genre(genre) is None]
+            if unknown:
+                raise ValueError(f"genres: unknown genre {', '.join(map(repr, unknown))}")
+            value = canonical_genres(value)
+        if key in ('seeking_talent', 'seeking_venue') and isinstance(value, str):
+            value = value.strip().lower() in ('true', 'y', 'yes', '1')
+        if isinstance(value, list):
+            for item in value:
+                data.add(key, item)
+        elif value is True:
+            data.add(key, 'y')
+        elif value not in (None, False, ''):
+            data.add(key, str(value))
+    return data
+
+
+def missing_references(batch):
+    # One round trip for the whole batch: a UNION ALL of an IN lookup per table.
+    artist_ids = {values['artist_id'] for _, values in batch}
+    venue_ids = {values['venue_id'] for _, values in batch}
+    found = db.session.query(db.literal('artist'), Artist.id).filter(Artist.id.in_(artist_ids)).union_all(
+        db.session.query(db.literal('venue'), Venue.id).filter(Venue.id.in_(venue_ids)))
+    found_artists, found_venues = set(), set()
+    for kind, ref_id in found:
+        (found_artists if kind == 'artist' else found_venues).add(ref_id)
+    return artist_ids - found_artists, venue_ids - found_venues
+
+
+def known_references(batch, errors):
+    # The rows whose artist and venue both exist.
+    missing_artists, missing_venues = missing_references(batch)
+    valid = []
+    for row_number, values in batch:
+        if values['artist_id'] in missing_artists:
+            errors.append((row_number, f"artist {values['artist_id']} does not exist"))
+        elif values['venue_id'] in missing_venues:
+            errors.append((row_number, f"venue {values['venue_id']} does not exist"))
+        else:
+            valid.append((row_number, values))
+    return valid
+
+
+def flush(model, batch, errors):
+    if model is Show:
+        batch = known_references(batch, errors)
+    if not batch:
+        return 0
+
+    try:
+        db.session.execute(model.__table__.insert(), [values for _, values in batch])
+    except IntegrityError:
+        # Some row double-books an artist or venue: find it row by row.
+        db.session.rollback()
+        batch = insert_rows(model, batch, errors)
+        if not batch:
+            return 0
+    if model is Show:
+        refresh_summaries(Venue, list({values['venue_id'] for _, values in batch}))
+        refresh_summaries(Artist, list({values['artist_id'] for _, values in batch}))
+    db.session.commit()
+    return len(batch)
+
+
+def insert_rows(model, batch, errors):
+    # Each row in its own savepoint; the inserted rows come back with their id.
+    inserted = []
+    for row_number, values in batch:
+        try:
+            with db.session.begin_nested():
+                result = db.session.execute(model.__table__.insert(), values)
+        except IntegrityError as e:
+            errors.append((row_number, str(e.orig).strip().splitlines()[0]))
+        else:
+            inserted.append((row_number, dict(values, id=result.inserted_primary_key[0])))
+    return inserted
+
+
+def validated_rows(form_class, values, rows, errors):
+    # (row_number, column values) for every row the form accepts; the
+    # others are reported in `errors`.
+    form = None
+    for row_number, row in enumerate(rows, 1):
+        if isinstance(row, Exception) or not isinstance(row, dict):
+            errors.append((row_number, f'unreadable row: {row}'))
+            continue
+        try:
+            formdata = to_formdata(row)
+        except ValueError as e:
+            errors.append((row_number, str(e)))
+            continue
+
+        if form is None:
+            form = form_class(formdata=formdata, meta={'csrf': False})
+        else:
+            form.process(formdata)
+        if not form.validate():
+            errors.append((row_number, '; '.join(
+                f"{field}: {', '.join(messages)}" for field, messages in form.errors.items())))
+            continue
+        try:
+            yield row_number, values(form)
+        except (TypeError, ValueError) as e:
+            errors.append((row_number, str(e)))
+
+
+def import_rows(kind, rows, batch_size=1000):
+    """Validate and insert `rows`; returns (imported, [(row_number, error)])."""
+    model, form_class, values = KINDS[kind]
+    imported = 0
+    errors = []
+    batch = []
+    for row in validated_rows(form_class, values, rows, errors):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            imported += flush(model, batch, errors)
+            batch = []
+    imported += flush(model, batch, errors)
+    return imported, errors
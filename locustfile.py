@@ -0,0 +1,49 @@
+"""HTTP load scenario for a running server:
+
+    locust -f locustfile.py --host http://localhost:5000 --users 200 --spawn-rate 20
+
+Needs `pip install locust` and a seeded database (`flask fyyur seed`).
+"""
+import random
+from locust import HttpUser, between, task
+
+SEARCH_TERMS = ['blue', 'room', 'neon', 'echo', 'wild', 'a']
+
+
+class Visitor(HttpUser):
+    wait_time = between(0.5, 2)
+
+    def on_start(self):
+        venues = self.client.get('/api/v1/venues', name='/api/v1/venues').json()
+        self.venue_ids = [venue['id'] for area in venues for venue in area['venues']] or [1]
+        self.artist_ids = [artist['id'] for artist in self.client.get(
+            '/api/v1/artists', name='/api/v1/artists').json()] or [1]
+
+    @task(3)
+    def home(self):
+        self.client.get('/')
+
+    @task(3)
+    def venues(self):
+        self.client.get('/venues')
+
+    @task(2)
+    def artists(self):
+        self.client.get('/artists')
+
+    @task(3)
+    def shows(self):
+        self.client.get('/shows')
+
+    @task(6)
+    def venue_page(self):
+        self.client.get(f'/venues/{random.choice(self.venue_ids)}', name='/venues/[id]')
+
+    @task(6)
+    def artist_page(self):
+        self.client.get(f'/artists/{random.choice(self.artist_ids)}', name='/artists/[id]')
+
+    @task(2)
+    def search(self):
+        self.client.post('/artists/search', data={'search_term': random.choice(SEARCH_TERMS)})
+        self.client.post('/venues/search', data={'search_term': random.choice(SEARCH_TERMS)})
@@ -0,0 +1,36 @@
+"""add shows and name lookup indexes
+
+Revision ID: 0f2c0fe1a254
+Revises: 8fee2eefb459
+Create Date: 2026-10-18 12:47:44.715019
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0f2c0fe1a254'
+down_revision = '8fee2eefb459'
+branch_labels = None
+depends_on = None
+
+
+# IF NOT EXISTS: db.create_all() already creates these on a fresh database.
+INDEXES = {
+    'ix_shows_venue_id_created_time': 'shows (venue_id, created_time)',
+    'ix_shows_artist_id_created_time': 'shows (artist_id, created_time)',
+    'ix_shows_created_time_id': 'shows (created_time, id)',
+    'ix_venue_lower_name': '"Venue" (lower(name))',
+    'ix_artist_lower_name': '"Artist" (lower(name))',
+}
+
+
+def upgrade():
+    for name, target in INDEXES.items():
+        op.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {target}')
+
+
+def downgrade():
+    for name in INDEXES:
+        op.execute(f'DROP INDEX IF EXISTS {name}')
@@ -0,0 +1,37 @@
+"""add updated_at columns
+
+Revision ID: 20389b4245d3
+Revises: 20582c69b3ea
+Create Date: 2026-10-18 12:51:46.230978
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20389b4245d3'
+down_revision = '20582c69b3ea'
+branch_labels = None
+depends_on = None
+
+
+TABLES = ('shows', 'Venue', 'Artist')
+
+
+def upgrade():
+    # IF NOT EXISTS: db.create_all() already adds these on a fresh database.
+    for table in TABLES:
+        op.execute(f'''
+            ALTER TABLE "{table}" ADD COLUMN IF NOT EXISTS
+                updated_at timestamp without time zone NOT NULL DEFAULT now()
+        ''')
+        op.execute(
+            f'CREATE INDEX IF NOT EXISTS ix_{table}_updated_at ON "{table}" (updated_at)'
+        )
+
+
+def downgrade():
+    for table in TABLES:
+        op.execute(f'DROP INDEX IF EXISTS ix_{table}_updated_at')
+        op.execute(f'ALTER TABLE "{table}" DROP COLUMN IF EXISTS updated_at')
@@ -0,0 +1,53 @@
+"""add show summary columns
+
+Revision ID: 20582c69b3ea
+Revises: 0f2c0fe1a254
+Create Date: 2026-10-18 12:50:00.546325
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20582c69b3ea'
+down_revision = '0f2c0fe1a254'
+branch_labels = None
+depends_on = None
+
+
+SUMMARIES = {'Venue': 'venue_id', 'Artist': 'artist_id'}
+
+
+def upgrade():
+    # IF NOT EXISTS: db.create_all() already adds these on a fresh database.
+    for table, column in SUMMARIES.items():
+        op.execute(f'''
+            ALTER TABLE "{table}"
+                ADD COLUMN IF NOT EXISTS upcoming_count integer NOT NULL DEFAULT 0,
+                ADD COLUMN IF NOT EXISTS past_count integer NOT NULL DEFAULT 0,
+                ADD COLUMN IF NOT EXISTS next_show_at timestamp without time zone
+        ''')
+        op.execute(
+            f'CREATE INDEX IF NOT EXISTS ix_{table}_next_show_at ON "{table}" (next_show_at)'
+        )
+        op.execute(f'''
+            UPDATE "{table}" SET
+                upcoming_count = (SELECT count(*) FROM shows
+                    WHERE shows.{column} = "{table}".id AND shows.created_time > now()),
+                past_count = (SELECT count(*) FROM shows
+                    WHERE shows.{column} = "{table}".id AND shows.created_time <= now()),
+                next_show_at = (SELECT min(created_time) FROM shows
+                    WHERE shows.{column} = "{table}".id AND shows.created_time > now())
+        ''')
+
+
+def downgrade():
+    for table in SUMMARIES:
+        op.execute(f'DROP INDEX IF EXISTS ix_{table}_next_show_at')
+        op.execute(f'''
+            ALTER TABLE "{table}"
+                DROP COLUMN IF EXISTS next_show_at,
+                DROP COLUMN IF EXISTS past_count,
+                DROP COLUMN IF EXISTS upcoming_count
+        ''')
@@ -0,0 +1,60 @@
+"""add venue coordinates
+
+Revision ID: 53b086b78e2a
+Revises: 20389b4245d3
+Create Date: 2026-10-18 13:02:12.418305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from geo import CITY_COORDINATES
+
+
+# revision identifiers, used by Alembic.
+revision = '53b086b78e2a'
+down_revision = '20389b4245d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # IF NOT EXISTS: db.create_all() already adds these on a fresh database.
+    op.execute('''
+        ALTER TABLE "Venue"
+            ADD COLUMN IF NOT EXISTS latitude double precision,
+            ADD COLUMN IF NOT EXISTS longitude double precision
+    ''')
+    op.execute('CREATE EXTENSION IF NOT EXISTS cube')
+    op.execute('CREATE EXTENSION IF NOT EXISTS earthdistance')
+    op.execute(
+        'CREATE INDEX IF NOT EXISTS ix_venue_earth ON "Venue" '
+        'USING gist (ll_to_earth(latitude, longitude))'
+    )
+
+    # Place existing venues with the same table the app uses on write.
+    cities = sa.table(
+        'cities',
+        sa.column('city', sa.String),
+        sa.column('state', sa.String),
+        sa.column('lat', sa.Float),
+        sa.column('lng', sa.Float)
+    )
+    values = sa.values(*cities.columns, name='cities').data(
+        [(city, state, lat, lng) for (city, state), (lat, lng) in CITY_COORDINATES.items()])
+    venue = sa.table(
+        'Venue',
+        sa.column('city', sa.String),
+        sa.column('state', sa.String),
+        sa.column('latitude', sa.Float),
+        sa.column('longitude', sa.Float)
+    )
+    op.execute(venue.update().values(latitude=values.c.lat, longitude=values.c.lng).where(
+        sa.func.lower(sa.func.regexp_replace(sa.func.trim(venue.c.city), r'\s+', ' ', 'g')) == values.c.city,
+        sa.func.upper(sa.func.trim(venue.c.state)) == values.c.state
+    ))
+
+
+def downgrade():
+    op.execute('DROP INDEX IF EXISTS ix_venue_earth')
+    op.execute('ALTER TABLE "Venue" DROP COLUMN IF EXISTS longitude, DROP COLUMN IF EXISTS latitude')
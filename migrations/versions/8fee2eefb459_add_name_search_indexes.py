@@ -0,0 +1,37 @@
+"""add name search indexes
+
+Revision ID: 8fee2eefb459
+Revises: 
+Create Date: 2026-10-18 12:46:46.613253
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8fee2eefb459'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for table in ('Artist', 'Venue'):
+        prefix = table.lower()
+        op.execute(
+            f'CREATE INDEX ix_{prefix}_name_fts ON "{table}" '
+            f"USING gin (to_tsvector('simple', coalesce(name, '')))"
+        )
+        op.execute(
+            f'CREATE INDEX ix_{prefix}_name_trgm ON "{table}" '
+            f'USING gin (name gin_trgm_ops)'
+        )
+
+
+def downgrade():
+    for table in ('Artist', 'Venue'):
+        prefix = table.lower()
+        op.execute(f'DROP INDEX IF EXISTS ix_{prefix}_name_trgm')
+        op.execute(f'DROP INDEX IF EXISTS ix_{prefix}_name_fts')
@@ -0,0 +1,38 @@
+"""add genre indexes
+
+Revision ID: b7d41c2e9a06
+Revises: 53b086b78e2a
+Create Date: 2026-10-18 13:10:37.902114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from genres import canonical_genres
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d41c2e9a06'
+down_revision = '53b086b78e2a'
+branch_labels = None
+depends_on = None
+
+
+TABLES = ('Venue', 'Artist')
+
+
+def upgrade():
+    conn = op.get_bind()
+    for name in TABLES:
+        # Rewrite stored genres in canonical form, as the app now does on write.
+        table = sa.table(name, sa.column('id', sa.Integer), sa.column('genres', sa.ARRAY(sa.String)))
+        for row in conn.execute(sa.select(table.c.id, table.c.genres).where(table.c.genres.isnot(None))):
+            genres = canonical_genres(row.genres)
+            if genres != row.genres:
+                conn.execute(table.update().where(table.c.id == row.id).values(genres=genres))
+        op.execute(f'CREATE INDEX IF NOT EXISTS ix_{name.lower()}_genres ON "{name}" USING gin (genres)')
+
+
+def downgrade():
+    for name in TABLES:
+        op.execute(f'DROP INDEX IF EXISTS ix_{name.lower()}_genres')
@@ -0,0 +1,57 @@
+"""add show durations
+
+Revision ID: c3e9f0a81d57
+Revises: b7d41c2e9a06
+Create Date: 2026-10-18 13:21:54.664810
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e9f0a81d57'
+down_revision = 'b7d41c2e9a06'
+branch_labels = None
+depends_on = None
+
+
+def slot(alias=''):
+    # created_time is a timestamp without time zone, so the ranges are tsrange.
+    return f"tsrange({alias}created_time, {alias}created_time + {alias}duration_minutes * interval '1 minute')"
+
+
+CONSTRAINTS = {
+    'shows_venue_id_no_overlap': 'venue_id',
+    'shows_artist_id_no_overlap': 'artist_id'
+}
+
+
+def upgrade():
+    # IF NOT EXISTS: db.create_all() already adds the column on a fresh database.
+    op.execute('ALTER TABLE shows ADD COLUMN IF NOT EXISTS duration_minutes integer NOT NULL DEFAULT 120')
+    op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+
+    conn = op.get_bind()
+    for name, column in CONSTRAINTS.items():
+        overlaps = conn.execute(sa.text(f'''
+            SELECT a.id, b.id FROM shows a JOIN shows b
+                ON a.{column} = b.{column} AND a.id < b.id
+                AND {slot('a.')} && {slot('b.')}
+            LIMIT 10
+        ''')).fetchall()
+        if overlaps:
+            raise RuntimeError(
+                f'cannot add {name}: these shows overlap on {column}: '
+                + ', '.join(f'{a} and {b}' for a, b in overlaps)
+                + '. Move or shorten them and run the migration again.')
+        exists = conn.execute(sa.text(
+            'SELECT 1 FROM pg_constraint WHERE conname = :name'), {'name': name}).first()
+        if not exists:
+            op.execute(f'ALTER TABLE shows ADD CONSTRAINT {name} EXCLUDE USING gist ({column} WITH =, {slot()} WITH &&)')
+
+
+def downgrade():
+    for name in CONSTRAINTS:
+        op.execute(f'ALTER TABLE shows DROP CONSTRAINT IF EXISTS {name}')
+    op.execute('ALTER TABLE shows DROP COLUMN IF EXISTS duration_minutes')
@@ -0,0 +1,44 @@
+"""add show history
+
+Revision ID: d4a1e7c52b90
+Revises: c3e9f0a81d57
+Create Date: 2026-10-18 15:02:37.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4a1e7c52b90'
+down_revision = 'c3e9f0a81d57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # IF NOT EXISTS: db.create_all() already creates the (partitioned) table on
+    # a fresh database. Monthly partitions are added by archive.py as needed.
+    op.execute('''
+        CREATE TABLE IF NOT EXISTS show_history (
+            id integer NOT NULL,
+            created_time timestamp without time zone NOT NULL,
+            artist_id integer NOT NULL REFERENCES "Artist" (id) ON DELETE CASCADE,
+            venue_id integer NOT NULL REFERENCES "Venue" (id) ON DELETE CASCADE,
+            duration_minutes integer NOT NULL,
+            updated_at timestamp without time zone NOT NULL,
+            PRIMARY KEY (id, created_time)
+        ) PARTITION BY RANGE (created_time)
+    ''')
+    for column in ('venue_id', 'artist_id'):
+        op.execute(f'CREATE INDEX IF NOT EXISTS ix_show_history_{column}_created_time '
+                   f'ON show_history ({column}, created_time)')
+
+
+def downgrade():
+    # Archived shows go back to `shows` first so no history is lost.
+    op.execute('''
+        INSERT INTO shows (id, artist_id, venue_id, created_time, duration_minutes, updated_at)
+        SELECT id, artist_id, venue_id, created_time, duration_minutes, updated_at FROM show_history
+    ''')
+    op.execute('DROP TABLE IF EXISTS show_history')
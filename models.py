@@ -1,16 +1,28 @@
 #INSERT INTO "Artist"(name, city, state, phone, genres, image_link, website_link) VALUES('Mavins House', 'Lagos', 'Lagos', '08097005320', '{"rock", "pop"}', 'link', 'link');  
-from flask import Flask
 from flask_moment import Moment
-from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime 
+from sqlalchemy import event
+from geo import geocode
+from genres import canonical_genres
 
 
-app = Flask(__name__)
-moment = Moment(app)
-app.config.from_object('config')
-db = SQLAlchemy(app)
-migrate = Migrate(app, db)
+# Unbound extensions; create_app() in app.py binds them. Importing this module
+# never connects to the database: the schema is created by
+# `flask fyyur create-schema` (or `flask db upgrade`), not on import.
+db = SQLAlchemy()
+moment = Moment()
+
+
+def init_db(app):
+    db.init_app(app)
+    if app.config.get('DB_PGBOUNCER'):
+        timeout = app.config['DB_STATEMENT_TIMEOUT_MS']
+
+        def set_statement_timeout(conn):
+            conn.exec_driver_sql(f"SET LOCAL statement_timeout = {timeout}")
+
+        event.listen(db.get_engine(app), 'begin', set_statement_timeout)
 
 
 
@@ -18,16 +30,46 @@ migrate = Migrate(app, db)
 # Models.
 #----------------------------------------------------------------------------#
 
+# A text[] on PostgreSQL (GIN indexed, see the "add genre indexes" migration);
+# SQLite, used by the tests, stores the same list as JSON.
+GENRES_TYPE = db.ARRAY(db.String).with_variant(db.JSON, 'sqlite')
+
 class Show(db.Model):
     __tablename__ = 'shows'
+    __table_args__ = (
+        db.Index('ix_shows_venue_id_created_time', 'venue_id', 'created_time'),
+        db.Index('ix_shows_artist_id_created_time', 'artist_id', 'created_time'),
+        db.Index('ix_shows_created_time_id', 'created_time', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     artist_id = db.Column(db.Integer, db.ForeignKey('Artist.id', ondelete='CASCADE'), nullable=False)
     venue_id = db.Column(db.Integer, db.ForeignKey('Venue.id', ondelete='CASCADE'), nullable=False)
     created_time = db.Column(db.DateTime(), nullable=False)
+    # The show occupies [created_time, created_time + duration_minutes); see availability.py
+    duration_minutes = db.Column(db.Integer, nullable=False, default=120, server_default='120')
+    updated_at = db.Column(db.DateTime(), nullable=False, default=datetime.now, onupdate=datetime.now, server_default=db.func.now(), index=True)
     venue = db.relationship('Venue', back_populates='artist_show', lazy=True, cascade='all, delete', passive_deletes=True)
     artist = db.relationship('Artist', back_populates='venue_show', lazy=True, cascade='all, delete', passive_deletes=True)
     
 
+class ShowHistory(db.Model):
+    # Past shows moved out of `shows` by archive.py. On PostgreSQL the table is
+    # range partitioned by month of created_time; see the migration.
+    __tablename__ = 'show_history'
+    __table_args__ = (
+        db.Index('ix_show_history_venue_id_created_time', 'venue_id', 'created_time'),
+        db.Index('ix_show_history_artist_id_created_time', 'artist_id', 'created_time'),
+        {'postgresql_partition_by': 'RANGE (created_time)'}
+    )
+    # The partition key has to be part of the primary key.
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    created_time = db.Column(db.DateTime(), primary_key=True)
+    artist_id = db.Column(db.Integer, db.ForeignKey('Artist.id', ondelete='CASCADE'), nullable=False)
+    venue_id = db.Column(db.Integer, db.ForeignKey('Venue.id', ondelete='CASCADE'), nullable=False)
+    duration_minutes = db.Column(db.Integer, nullable=False)
+    updated_at = db.Column(db.DateTime(), nullable=False)
+
+
 class Venue(db.Model):
     __tablename__ = 'Venue'
     id = db.Column(db.Integer, primary_key=True)
@@ -36,13 +78,21 @@ class Venue(db.Model):
     state = db.Column(db.String(150))
     address = db.Column(db.String(150))
     phone = db.Column(db.String(150))
-    genres = db.Column(db.ARRAY(db.String))
+    genres = db.Column(GENRES_TYPE)
     image_link = db.Column(db.String(500))
     facebook_link = db.Column(db.String(500))
     # TODO: implement any missing fields, as a database migration using Flask-Migrate
     seeking_talent = db.Column(db.Boolean)
     website_link = db.Column(db.String(500))
     seeking_desc = db.Column(db.String())
+    # City centre from geo.py, set whenever city or state is written
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
+    # Show summary, kept current by summary.py
+    upcoming_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    next_show_at = db.Column(db.DateTime(), index=True)
+    updated_at = db.Column(db.DateTime(), nullable=False, default=datetime.now, onupdate=datetime.now, server_default=db.func.now(), index=True)
     artist_show = db.relationship("Show", back_populates='venue', lazy=True, cascade='all, delete')
 
     def __repr__(self):
@@ -55,15 +105,35 @@ class Artist(db.Model):
     city = db.Column(db.String(150))
     state = db.Column(db.String(150))
     phone = db.Column(db.String())
-    genres = db.Column(db.ARRAY(db.String))
+    genres = db.Column(GENRES_TYPE)
     image_link = db.Column(db.String(500))
     facebook_link = db.Column(db.String(500))
     # TODO: implement any missing fields, as a database migration using Flask-Migrate
     seeking_venue = db.Column(db.Boolean)
     website_link = db.Column(db.String(120))
     seeking_desc = db.Column(db.String())
+    # Show summary, kept current by summary.py
+    upcoming_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    next_show_at = db.Column(db.DateTime(), index=True)
+    updated_at = db.Column(db.DateTime(), nullable=False, default=datetime.now, onupdate=datetime.now, server_default=db.func.now(), index=True)
     venue_show = db.relationship("Show",  back_populates='artist', lazy=True, cascade='all, delete')
 
     def __repr__(self):
         return f'<Todo {self.id} {self.name} {self.city}>'
-db.create_all()
+
+@event.listens_for(Venue, 'before_insert')
+@event.listens_for(Venue, 'before_update')
+def set_venue_coordinates(mapper, connection, venue):
+    venue.latitude, venue.longitude = geocode(venue.city, venue.state)
+
+@event.listens_for(Venue, 'before_insert')
+@event.listens_for(Venue, 'before_update')
+@event.listens_for(Artist, 'before_insert')
+@event.listens_for(Artist, 'before_update')
+def set_canonical_genres(mapper, connection, target):
+    if target.genres is not None:
+        target.genres = canonical_genres(target.genres)
+
+db.Index('ix_venue_lower_name', db.func.lower(Venue.name))
+db.Index('ix_artist_lower_name', db.func.lower(Artist.name))
@@ -0,0 +1,37 @@
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app, g
+
+#----------------------------------------------------------------------------#
+# Concurrent queries.
+#----------------------------------------------------------------------------#
+# With CONCURRENT_QUERIES on, independent queries inside one handler run on a
+# shared thread pool, each in its own app context and therefore its own
+# session and pooled connection. Results must be plain rows, not ORM objects,
+# because each session is removed when its call returns. With it off (the
+# default, and what the tests use) the calls simply run in order.
+
+def get_executor(app):
+    # One pool per app, sized by its own QUERY_WORKERS.
+    executor = app.extensions.get('query_executor')
+    if executor is None:
+        executor = app.extensions.setdefault('query_executor', ThreadPoolExecutor(
+            max_workers=app.config.get('QUERY_WORKERS', 8), thread_name_prefix='fyyur-query'))
+    return executor
+
+
+def run_concurrently(*calls):
+    app = current_app._get_current_object()
+    if not app.config.get('CONCURRENT_QUERIES'):
+        return [call() for call in calls]
+
+    # Share the request's query log so the profiler still sees these queries.
+    profile = g.get('profile')
+
+    def run(call):
+        with app.app_context():
+            if profile is not None:
+                g.profile = profile
+            return call()
+
+    futures = [get_executor(app).submit(run, call) for call in calls]
+    return [future.result() for future in futures]
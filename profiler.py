@@ -0,0 +1,169 @@
+import threading
+import time
+from collections import Counter, deque
+from flask import current_app, g, has_app_context, render_template, request, abort, Response
+from flask.signals import signals_available, before_render_template, template_rendered
+from sqlalchemy import event
+
+#----------------------------------------------------------------------------#
+# Request profiler.
+#----------------------------------------------------------------------------#
+# Records every statement run on the engine during a request, then reports
+# query count, DB time, repeated statements (the N+1 signature) and template
+# render time as a Server-Timing header, on /debug/profile and as Prometheus
+# counters on /metrics. Slow requests are logged with their queries.
+
+class ProfilerState:
+    # One per app, in app.extensions['profiler'].
+    def __init__(self, engine, slow_ms, panel):
+        self.engine = engine
+        self.slow_ms = slow_ms
+        self.panel = panel
+        self.recent = deque(maxlen=50)
+        self.totals = {}
+        self.lock = threading.Lock()
+
+
+class Profiler:
+    def __init__(self, app=None, db=None):
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        engine = db.get_engine(app)
+        app.extensions['profiler'] = ProfilerState(
+            engine, app.config.get('PROFILE_SLOW_REQUEST_MS', 500), app.config.get('PROFILE_PANEL', False))
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+        if signals_available:
+            before_render_template.connect(self._before_render, app)
+            template_rendered.connect(self._after_render, app)
+
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.add_url_rule('/metrics', 'metrics', self.metrics)
+        app.add_url_rule('/debug/profile', 'debug_profile', self.debug_profile)
+
+    @property
+    def state(self):
+        return current_app.extensions['profiler']
+
+    @property
+    def recent(self):
+        return self.state.recent
+
+    # Hooks.
+
+    def _start(self):
+        g.profile = {'start': time.perf_counter(), 'queries': [], 'render': 0.0}
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('profile_start', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['profile_start'].pop()
+        if has_app_context() and 'profile' in g:
+            g.profile['queries'].append((statement, elapsed))
+
+    def _before_render(self, sender, template, context):
+        if 'profile' in g:
+            g.profile['render_start'] = time.perf_counter()
+
+    def _after_render(self, sender, template, context):
+        if 'profile' in g and 'render_start' in g.profile:
+            g.profile['render'] += time.perf_counter() - g.profile.pop('render_start')
+
+    def _finish(self, response):
+        profile = g.pop('profile', None)
+        if profile is None or request.endpoint in ('metrics', 'debug_profile', 'static', 'assets'):
+            return response
+
+        total = time.perf_counter() - profile['start']
+        queries = profile['queries']
+        db_time = sum(elapsed for _, elapsed in queries)
+        repeated = {statement: count for statement, count in
+                    Counter(statement for statement, _ in queries).items() if count > 1}
+        duplicates = sum(count - 1 for count in repeated.values())
+
+        response.headers.add('Server-Timing', ', '.join([
+            f'db;dur={db_time * 1000:.1f};desc="{len(queries)} queries, {duplicates} repeated"',
+            f'render;dur={profile["render"] * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}'
+        ]))
+
+        record = {
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'endpoint': request.endpoint or 'unknown',
+            'status': response.status_code,
+            'total_ms': total * 1000,
+            'db_ms': db_time * 1000,
+            'render_ms': profile['render'] * 1000,
+            'queries': queries,
+            'repeated': repeated
+        }
+        state = self.state
+        with state.lock:
+            state.recent.appendleft(record)
+            totals = state.totals.setdefault(record['endpoint'], Counter())
+            totals['requests'] += 1
+            totals['seconds'] += total
+            totals['db_seconds'] += db_time
+            totals['render_seconds'] += profile['render']
+            totals['queries'] += len(queries)
+            totals['repeated_queries'] += duplicates
+
+        if record['total_ms'] > state.slow_ms:
+            current_app.logger.warning(
+                'Slow request %s %s: %.1fms, %d queries (%.1fms)\n%s',
+                record['method'], record['path'], record['total_ms'], len(queries), record['db_ms'],
+                '\n'.join(f'  {elapsed * 1000:.1f}ms {statement}' for statement, elapsed in queries))
+        return response
+
+    # Views.
+
+    def debug_profile(self):
+        if not self.state.panel:
+            abort(404)
+        return render_template('pages/profile.html', requests=list(self.recent))
+
+    def metrics(self):
+        metrics = (
+            ('requests', 'fyyur_requests_total', 'Requests handled.'),
+            ('seconds', 'fyyur_request_seconds_total', 'Time spent handling requests.'),
+            ('db_seconds', 'fyyur_db_seconds_total', 'Time spent in database queries.'),
+            ('render_seconds', 'fyyur_render_seconds_total', 'Time spent rendering templates.'),
+            ('queries', 'fyyur_db_queries_total', 'Database queries run.'),
+            ('repeated_queries', 'fyyur_db_repeated_queries_total', 'Queries repeating an earlier statement in the same request.')
+        )
+        state = self.state
+        with state.lock:
+            totals = {endpoint: dict(counter) for endpoint, counter in state.totals.items()}
+        lines = []
+        for key, name, help_text in metrics:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} counter')
+            for endpoint, counter in sorted(totals.items()):
+                lines.append(f'{name}{{endpoint="{endpoint}"}} {counter.get(key, 0)}')
+
+        pool = state.engine.pool
+        if hasattr(pool, 'checkedout'):
+            for name, value, help_text in (
+                ('fyyur_db_pool_size', pool.size(), 'Configured pool size.'),
+                ('fyyur_db_pool_checked_out', pool.checkedout(), 'Connections in use.'),
+                ('fyyur_db_pool_overflow', pool.overflow(), 'Connections opened beyond the pool size.')
+            ):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} gauge')
+                lines.append(f'{name} {value}')
+
+        cache = current_app.extensions.get('cache')
+        if cache is not None:
+            stats = cache.stats()
+            for key in ('hits', 'misses'):
+                lines.append(f'# TYPE fyyur_cache_{key}_total counter')
+                lines.append(f'fyyur_cache_{key}_total {stats[key]}')
+        return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+
+profiler = Profiler()
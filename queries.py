@@ -0,0 +1,418 @@
+from collections import Counter
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from models import Venue, Show, ShowHistory, Artist, db
+from parallel import run_concurrently
+from geo import KDTree
+from search import name_index
+
+#----------------------------------------------------------------------------#
+# Queries.
+#----------------------------------------------------------------------------#
+
+# Past shows listed on a venue or artist page; the page counts all of them.
+PAST_SHOWS_LIMIT = 30
+
+def recent_listings(limit=10):
+    artists, venues = run_concurrently(
+        lambda: db.session.query(Artist.id, Artist.name).order_by(
+            Artist.id.desc()).limit(limit).all(),
+        lambda: db.session.query(Venue.id, Venue.name).order_by(
+            Venue.id.desc()).limit(limit).all()
+    )
+    return {
+        'artists': [{'id': artist.id, 'name': artist.name} for artist in artists],
+        'venues': [{'id': venue.id, 'name': venue.name} for venue in venues]
+    }
+
+
+def artist_list():
+    artists = db.session.query(Artist.id, Artist.name).all()
+    return [{'id': artist.id, 'name': artist.name} for artist in artists]
+
+
+def venue_areas():
+    # One query for the whole area -> venues tree; counts come from the
+    # denormalized show summary (see summary.py).
+    rows = db.session.query(
+        Venue.city,
+        Venue.state,
+        Venue.id,
+        Venue.name,
+        Venue.upcoming_count.label('num_upcoming_shows')
+    ).order_by(Venue.state, Venue.city, Venue.id).all()
+
+    areas = []
+    for row in rows:
+        if not areas or (areas[-1]['city'], areas[-1]['state']) != (row.city, row.state):
+            areas.append({
+              'city': row.city,
+              'state': row.state,
+              'venues': []
+            })
+        areas[-1]['venues'].append({
+          'id': row.id,
+          'name': row.name,
+          'num_upcoming_shows': row.num_upcoming_shows
+        })
+    return areas
+
+
+def encode_cursor(start_time, show_id):
+    return f'{start_time.isoformat()}_{show_id}'
+
+
+def decode_cursor(cursor):
+    start_time, show_id = cursor.rsplit('_', 1)
+    return datetime.fromisoformat(start_time), int(show_id)
+
+
+def show_page(after=None, limit=30):
+    # Keyset pagination on (start_time, id): every page is an index range scan
+    # that only reads `limit` rows, however deep into the listing it is.
+    query = db.session.query(
+        Show.id,
+        Show.created_time,
+        Show.venue_id,
+        Venue.name.label('venue_name'),
+        Show.artist_id,
+        Artist.name.label('artist_name'),
+        Artist.image_link.label('artist_image_link')
+    ).join(Show.venue).join(Show.artist)
+    if after:
+        query = query.filter(db.tuple_(Show.created_time, Show.id) > decode_cursor(after))
+    rows = query.order_by(Show.created_time, Show.id).limit(limit + 1).all()
+
+    shows = []
+    for row in rows[:limit]:
+        shows.append({
+          'venue_id': row.venue_id,
+          'venue_name': row.venue_name,
+          'artist_id': row.artist_id,
+          'artist_name': row.artist_name,
+          'artist_image_link': row.artist_image_link,
+          'start_time': row.created_time
+        })
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last.created_time, last.id)
+    return shows, next_cursor
+
+
+def name_search(model, term):
+    # Returns (filter, rank) expressions for matching `term` against model.name.
+    # On Postgres these hit the full-text and trigram GIN indexes created by the
+    # "add name search indexes" migration; other engines look the term up in
+    # the in-memory trigram index from search.py.
+    term = term.strip()
+    if db.engine.dialect.name != 'postgresql':
+        return name_search_index(model, term)
+
+    config = db.literal_column("'simple'")
+    document = db.func.to_tsvector(config, db.func.coalesce(model.name, ''))
+    tsquery = db.func.plainto_tsquery(config, term)
+    match = db.or_(
+        document.op('@@')(tsquery),
+        model.name.ilike(f'%{term}%'),
+        model.name.op('%')(term)
+    )
+    rank = db.func.greatest(
+        db.func.ts_rank(document, tsquery),
+        db.func.similarity(model.name, term)
+    )
+    return match, rank
+
+
+def name_search_index(model, term):
+    # Matches the same names as LIKE '%term%'. The rank, computed on the
+    # matched rows only, puts the exact name first, then names starting with
+    # the term, then names with a word starting with it.
+    ids = name_index(model).search(term)
+    if not ids:
+        return db.false(), db.literal(0)
+    name = db.func.lower(model.name)
+    term = term.lower()
+    match = model.id.in_(db.bindparam('name_search_ids', ids, expanding=True, literal_execute=True))
+    rank = db.case(
+        (name == term, 3),
+        (name.startswith(term, autoescape=True), 2),
+        (name.contains(f' {term}', autoescape=True), 1),
+        else_=0
+    )
+    return match, rank
+
+
+def venues_near(lat, lng, radius_km, limit=50):
+    # Venues within radius_km of (lat, lng), nearest first. On Postgres this
+    # is one query on the earthdistance GiST index from the "add venue
+    # coordinates" migration; other engines search a KD-tree of the venues.
+    if db.engine.dialect.name != 'postgresql':
+        return venues_near_kdtree(lat, lng, radius_km, limit)
+
+    origin = db.func.ll_to_earth(lat, lng)
+    point = db.func.ll_to_earth(Venue.latitude, Venue.longitude)
+    radius_m = radius_km * 1000
+    distance = db.func.earth_distance(origin, point)
+    rows = db.session.query(
+        Venue.id,
+        Venue.name,
+        Venue.city,
+        Venue.state,
+        Venue.upcoming_count,
+        (distance / 1000).label('distance_km')
+    ).filter(
+        db.func.earth_box(origin, radius_m).op('@>')(point),
+        distance <= radius_m
+    ).order_by(distance, Venue.id).limit(limit).all()
+    return [near_venue(row, row.distance_km) for row in rows]
+
+
+def venues_near_kdtree(lat, lng, radius_km, limit):
+    tree = KDTree(db.session.query(Venue.id, Venue.latitude, Venue.longitude).filter(
+        Venue.latitude.isnot(None), Venue.longitude.isnot(None)))
+    hits = tree.within(lat, lng, radius_km)[:limit]
+    rows = {row.id: row for row in db.session.query(
+        Venue.id, Venue.name, Venue.city, Venue.state, Venue.upcoming_count
+    ).filter(Venue.id.in_([venue_id for _, venue_id in hits]))}
+    return [near_venue(rows[venue_id], distance) for distance, venue_id in hits]
+
+
+def near_venue(row, distance_km):
+    return {
+        'id': row.id,
+        'name': row.name,
+        'city': row.city,
+        'state': row.state,
+        'distance_km': round(distance_km, 2),
+        'num_upcoming_shows': row.upcoming_count
+    }
+
+
+
+def genre_browse(model, genres, limit=30, offset=0):
+    # One page of the venues or artists having every genre in `genres`, the
+    # total, and how many of them carry each genre (the facet counts). On
+    # Postgres that is a single statement whose filter uses the GIN index
+    # from the "add genre indexes" migration; other engines filter in Python.
+    if db.engine.dialect.name != 'postgresql':
+        return genre_browse_rows(model, genres, limit, offset)
+
+    matched = db.session.query(
+        model.id,
+        model.name,
+        model.city,
+        model.state,
+        model.genres,
+        model.upcoming_count
+    )
+    if genres:
+        matched = matched.filter(model.genres.op('@>')(db.cast(genres, db.ARRAY(db.String))))
+    matched = matched.cte('matched')
+
+    page = db.select(matched).order_by(matched.c.name, matched.c.id).limit(limit).offset(offset).subquery('page')
+    item = db.func.json_build_object(
+        'id', page.c.id,
+        'name', page.c.name,
+        'city', page.c.city,
+        'state', page.c.state,
+        'genres', page.c.genres,
+        'num_upcoming_shows', page.c.upcoming_count
+    )
+    genre = db.func.unnest(matched.c.genres).table_valued('genre').render_derived()
+    facets = db.select(genre.c.genre, db.func.count().label('count')).select_from(
+        matched.join(genre, db.true())).group_by(genre.c.genre).subquery('facets')
+
+    row = db.session.query(
+        db.select(db.func.count()).select_from(matched).scalar_subquery().label('total'),
+        db.select(db.func.json_agg(aggregate_order_by(item, page.c.name, page.c.id))).scalar_subquery().label('data'),
+        db.select(db.func.json_object_agg(facets.c.genre, facets.c.count)).scalar_subquery().label('facets')
+    ).one()
+    return {
+        'count': row.total,
+        'genres': genres,
+        'facets': row.facets or {},
+        'data': row.data or []
+    }
+
+
+def genre_browse_rows(model, genres, limit, offset):
+    rows = db.session.query(
+        model.id, model.name, model.city, model.state, model.genres, model.upcoming_count
+    ).order_by(model.name, model.id).all()
+    matched = [row for row in rows if set(genres) <= set(row.genres or ())]
+    return {
+        'count': len(matched),
+        'genres': genres,
+        'facets': dict(Counter(genre for row in matched for genre in row.genres or ())),
+        'data': [{
+            'id': row.id,
+            'name': row.name,
+            'city': row.city,
+            'state': row.state,
+            'genres': row.genres,
+            'num_upcoming_shows': row.upcoming_count
+        } for row in matched[offset:offset + limit]]
+    }
+
+
+def search_results(model, term):
+    # Ranked venue or artist hits, with counts from the show summary.
+    match, rank = name_search(model, term)
+    rows = db.session.query(model.id, model.name, model.upcoming_count).filter(
+        match).order_by(rank.desc(), model.name).all()
+    return {
+        'count': len(rows),
+        'data': [{
+            'id': row.id,
+            'name': row.name,
+            'num_upcoming_shows': row.upcoming_count
+        } for row in rows]
+    }
+
+
+def show_search(filter_by, term):
+    # Shows whose venue or artist name matches `term`.
+    if filter_by not in ('venue', 'artist'):
+        raise ValueError(f'cannot search shows by {filter_by!r}')
+    match, rank = name_search(Venue if filter_by == 'venue' else Artist, term)
+    rows = db.session.query(
+        Show.created_time,
+        Show.venue_id,
+        Venue.name.label('venue_name'),
+        Show.artist_id,
+        Artist.name.label('artist_name'),
+        Artist.image_link.label('artist_image_link')
+    ).join(Show.venue).join(Show.artist).filter(match).order_by(rank.desc(), Show.id).all()
+    return {
+        'count': len(rows),
+        'data': [{
+            'venue_id': row.venue_id,
+            'venue_name': row.venue_name,
+            'artist_id': row.artist_id,
+            'artist_name': row.artist_name,
+            'artist_image_link': row.artist_image_link,
+            'start_time': row.created_time
+        } for row in rows]
+    }
+
+def split_shows(rows, keys):
+    # Partitions joined show rows on their is_upcoming flag in a single pass.
+    past_shows, upcoming_shows = [], []
+    for row in rows:
+        show = {key: getattr(row, key) for key in keys}
+        show['start_time'] = row.created_time
+        (upcoming_shows if row.is_upcoming else past_shows).append(show)
+    return past_shows, upcoming_shows
+
+
+def detail_show_rows(column, ref_id, other, limit=PAST_SHOWS_LIMIT):
+    """The shows where `column` ('artist_id' or 'venue_id') is `ref_id`, joined
+    to the `other` side (Artist or Venue), oldest first: every upcoming show and
+    the latest `limit` past ones, live or archived, in one statement. Each row
+    carries its is_upcoming flag and the total number of shows on its side of
+    that split."""
+    live, archived = Show.__table__, ShowHistory.__table__
+    shows = db.union_all(
+        db.select(live.c.artist_id, live.c.venue_id, live.c.created_time,
+                  (live.c.created_time > datetime.now()).label('is_upcoming')).where(
+            live.c[column] == ref_id),
+        db.select(archived.c.artist_id, archived.c.venue_id, archived.c.created_time,
+                  db.false()).where(archived.c[column] == ref_id)
+    ).subquery()
+    side = 'venue' if other is Venue else 'artist'
+    ranked = db.select(
+        shows.c.created_time,
+        shows.c.is_upcoming,
+        other.id.label(f'{side}_id'),
+        other.name.label(f'{side}_name'),
+        other.image_link.label(f'{side}_image_link'),
+        db.func.row_number().over(partition_by=shows.c.is_upcoming,
+                                  order_by=shows.c.created_time.desc()).label('recency'),
+        db.func.count().over(partition_by=shows.c.is_upcoming).label('total')
+    ).join(other, other.id == shows.c[f'{side}_id']).subquery()
+    return db.session.execute(db.select(ranked).where(
+        db.or_(ranked.c.is_upcoming, ranked.c.recency <= limit)
+    ).order_by(ranked.c.created_time)).all()
+
+
+def past_total(rows):
+    # Past shows beyond the listed ones are still counted, on every past row.
+    return next((row.total for row in rows if not row.is_upcoming), 0)
+
+
+def venue_detail(venue_id):
+    venue, rows = run_concurrently(
+        lambda: db.session.query(*Venue.__table__.columns).filter(Venue.id == venue_id).first(),
+        lambda: detail_show_rows('venue_id', venue_id, Artist)
+    )
+    if venue is None:
+        return None
+
+    past_shows, upcoming_shows = split_shows(
+        rows, ('artist_id', 'artist_name', 'artist_image_link'))
+
+    return {
+        'id': venue.id,
+        'name': venue.name,
+        'genres': venue.genres,
+        'address': venue.address,
+        'city': venue.city,
+        'state': venue.state,
+        'phone': venue.phone,
+        'website': venue.website_link,
+        'facebook_link': venue.facebook_link,
+        'seeking_talent': venue.seeking_talent,
+        'seeking_description': venue.seeking_desc,
+        'image_link': venue.image_link,
+        'past_shows': past_shows,
+        'upcoming_shows': upcoming_shows,
+        'past_shows_count': past_total(rows),
+        'upcoming_shows_count': len(upcoming_shows)
+    }
+
+
+def artist_detail(artist_id):
+    artist, rows = run_concurrently(
+        lambda: db.session.query(*Artist.__table__.columns).filter(Artist.id == artist_id).first(),
+        lambda: detail_show_rows('artist_id', artist_id, Venue)
+    )
+    if artist is None:
+        return None
+
+    past_shows, upcoming_shows = split_shows(
+        rows, ('venue_id', 'venue_name', 'venue_image_link'))
+
+    return {
+        'id': artist.id,
+        'name': artist.name,
+        'genres': artist.genres,
+        'city': artist.city,
+        'state': artist.state,
+        'phone': artist.phone,
+        'website': artist.website_link,
+        'facebook_link': artist.facebook_link,
+        'seeking_venue': artist.seeking_venue,
+        'seeking_description': artist.seeking_desc,
+        'image_link': artist.image_link,
+        'past_shows': past_shows,
+        'upcoming_shows': upcoming_shows,
+        'past_shows_count': past_total(rows),
+        'upcoming_shows_count': len(upcoming_shows)
+    }
+
+
+def related_artist_ids(venue_id):
+    # Artists whose pages list a show at this venue, live or archived.
+    return db.session.execute(
+        db.select(Show.artist_id).where(Show.venue_id == venue_id).union(
+            db.select(ShowHistory.artist_id).where(ShowHistory.venue_id == venue_id))
+    ).scalars().all()
+
+
+def related_venue_ids(artist_id):
+    # Venues whose pages list a show by this artist, live or archived.
+    return db.session.execute(
+        db.select(Show.venue_id).where(Show.artist_id == artist_id).union(
+            db.select(ShowHistory.venue_id).where(ShowHistory.artist_id == artist_id))
+    ).scalars().all()
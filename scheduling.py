@@ -0,0 +1,100 @@
+from collections import defaultdict
+from datetime import timedelta
+from sqlalchemy.exc import IntegrityError
+from models import Venue, Show, Artist, db
+from forms import ShowForm
+from importer import show_values, validated_rows, known_references, insert_rows
+from availability import bookings_for
+from summary import refresh_summaries
+
+#----------------------------------------------------------------------------#
+# Bulk scheduling.
+#----------------------------------------------------------------------------#
+# Books many shows (e.g. every date of a tour) in one transaction and a fixed
+# number of round trips however many rows there are: one query checks that
+# the artists and venues exist, one per side reads their bookings around the
+# requested dates, and a single multi-row INSERT ... RETURNING adds the
+# shows. Rows that fail are reported and the others are still booked.
+
+MAX_SHOWS = 500
+
+
+def slot(values):
+    start = values['created_time']
+    return start, start + timedelta(minutes=values['duration_minutes'])
+
+
+def double_bookings(batch, errors):
+    # The rows that overlap neither an existing show nor an earlier row of
+    # the batch for the same artist or venue.
+    start = min(slot(values)[0] for _, values in batch)
+    end = max(slot(values)[1] for _, values in batch)
+    booked = {
+        'artist': bookings_for(Show.artist_id, {values['artist_id'] for _, values in batch}, start, end),
+        'venue': bookings_for(Show.venue_id, {values['venue_id'] for _, values in batch}, start, end)
+    }
+    accepted = defaultdict(list)
+    valid = []
+    for row_number, values in batch:
+        row_start, row_end = slot(values)
+        for side in ('artist', 'venue'):
+            ref_id = values[f'{side}_id']
+            if booked[side][ref_id].overlapping(row_start, row_end):
+                errors.append((row_number, f'{side} {ref_id} is already booked at that time'))
+                break
+            if any(other_start < row_end and row_start < other_end
+                   for other_start, other_end in accepted[side, ref_id]):
+                errors.append((row_number, f'{side} {ref_id} is booked twice at that time in this request'))
+                break
+        else:
+            accepted['artist', values['artist_id']].append((row_start, row_end))
+            accepted['venue', values['venue_id']].append((row_start, row_end))
+            valid.append((row_number, values))
+    return valid
+
+
+def insert_shows(batch, errors):
+    if db.engine.dialect.name != 'postgresql':
+        return insert_rows(Show, batch, errors)
+    table = Show.__table__
+    try:
+        # Matched back by (artist, start): the batch never books an artist twice at once.
+        returned = db.session.execute(
+            table.insert().values([values for _, values in batch]).returning(
+                table.c.id, table.c.artist_id, table.c.created_time))
+    except IntegrityError:
+        # A show booked since the check took the slot: find the row one by one.
+        db.session.rollback()
+        return insert_rows(Show, batch, errors)
+    ids = {(row.artist_id, row.created_time): row.id for row in returned}
+    return [(row_number, dict(values, id=ids[values['artist_id'], values['created_time']]))
+            for row_number, values in batch]
+
+
+def booked_cache_keys(booked):
+    # The listings and pages that show the new shows.
+    return ['venues'] + sorted(
+        {f"venue:{values['venue_id']}" for _, values in booked} |
+        {f"artist:{values['artist_id']}" for _, values in booked})
+
+
+def schedule_shows(rows):
+    """Book `rows` of artist_id, venue_id, start_time and optional duration.
+
+    Returns ([(row_number, show)], [(row_number, error)]) where each show is
+    the dict of column values of a booked row, including its id.
+    """
+    errors = []
+    batch = list(validated_rows(ShowForm, show_values, rows, errors))
+    if batch:
+        batch = known_references(batch, errors)
+    if batch:
+        batch = double_bookings(batch, errors)
+    if batch:
+        batch = insert_shows(batch, errors)
+    if batch:
+        refresh_summaries(Venue, list({values['venue_id'] for _, values in batch}))
+        refresh_summaries(Artist, list({values['artist_id'] for _, values in batch}))
+    db.session.commit()
+    errors.sort()
+    return batch, errors
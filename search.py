@@ -0,0 +1,77 @@
+import threading
+from array import array
+from flask import current_app
+from models import db
+
+#----------------------------------------------------------------------------#
+# In-memory name search.
+#----------------------------------------------------------------------------#
+# Engines without the PostgreSQL full-text and trigram indexes (SQLite, used
+# by the tests) search venue and artist names with an inverted index of
+# their trigrams instead of a LIKE scan: the trigrams of the term pick the
+# candidates from the rarest one's postings, and a substring check keeps the
+# ones whose name really contains it, so the matches are exactly LIKE '%term%'.
+# Terms shorter than a trigram check every name.
+#
+# Each app keeps one index per table. Before a search, the rows updated since
+# the index was last brought up to date (by updated_at, which is indexed) are
+# added to it. Deleted rows stay in the index: the query that uses the ids
+# no longer finds them.
+
+def trigrams(text):
+    return {text[start:start + 3] for start in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.names = {}
+        # trigram -> ids, as arrays rather than sets so the garbage collector
+        # has nothing to walk in an index of a million names.
+        self.postings = {}
+        self.updated_at = None
+
+    def add(self, ref_id, name):
+        # Also used for renames. Postings are only appended to: the trigrams
+        # of an old name still list the id, and search() checks every
+        # candidate against its current name.
+        name = name.casefold() if name else None
+        with self.lock:
+            if name is None:
+                self.names.pop(ref_id, None)
+                return
+            if self.names.get(ref_id) == name:
+                return
+            self.names[ref_id] = name
+            for trigram in trigrams(name):
+                self.postings.setdefault(trigram, array('q')).append(ref_id)
+
+    def search(self, term):
+        """The ids of the names containing `term`, ignoring case."""
+        term = term.casefold()
+        grams = trigrams(term)
+        with self.lock:
+            if not grams:
+                return [ref_id for ref_id, name in self.names.items() if term in name]
+            # Every match is in the shortest posting list.
+            candidates = min((self.postings.get(gram, ()) for gram in grams), key=len)
+            return [ref_id for ref_id in set(candidates) if term in self.names.get(ref_id, '')]
+
+
+LOCK = threading.Lock()
+
+
+def name_index(model):
+    # This app's index of model.name, brought up to date.
+    newest = db.session.query(db.func.max(model.updated_at)).scalar()
+    with LOCK:
+        index = current_app.extensions.setdefault('name_search', {}).setdefault(
+            model.__tablename__, TrigramIndex())
+        if index.updated_at != newest:
+            rows = db.session.query(model.id, model.name)
+            if index.updated_at is not None:
+                rows = rows.filter(model.updated_at >= index.updated_at)
+            for ref_id, name in rows:
+                index.add(ref_id, name)
+            index.updated_at = newest
+    return index
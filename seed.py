@@ -0,0 +1,178 @@
+import math
+import random
+from itertools import accumulate
+from datetime import datetime, timedelta
+from models import Venue, Show, Artist, db
+from summary import rebuild_summaries
+from geo import geocode
+from genres import GENRES, canonical_genres
+
+#----------------------------------------------------------------------------#
+# Synthetic data.
+#----------------------------------------------------------------------------#
+# Deterministic for a given seed. Popularity is skewed: venues and artists are
+# picked with Zipf-like weights so a few are very busy, and a share of the
+# shows cluster on a handful of festival weekends.
+
+CITIES = [
+    ('San Francisco', 'CA'), ('New York', 'NY'), ('Austin', 'TX'), ('Chicago', 'IL'),
+    ('Nashville', 'TN'), ('New Orleans', 'LA'), ('Seattle', 'WA'), ('Denver', 'CO'),
+    ('Atlanta', 'GA'), ('Boston', 'MA'), ('Portland', 'OR'), ('Miami', 'FL'),
+    ('Detroit', 'MI'), ('Philadelphia', 'PA'), ('Minneapolis', 'MN'), ('Phoenix', 'AZ')
+]
+WORDS = [
+    'Blue', 'Velvet', 'Electric', 'Golden', 'Midnight', 'Crimson', 'Silver', 'Wild',
+    'Echo', 'Lantern', 'Harbor', 'Static', 'Neon', 'Copper', 'Hollow', 'Rolling'
+]
+BATCH_SIZE = 5000
+DURATIONS = [60, 90, 120, 120, 180]
+ATTEMPTS = 20
+
+
+def zipf_weights(count, skew=1.1):
+    return [1 / (rank ** skew) for rank in range(1, count + 1)]
+
+
+def place(rng):
+    return rng.choices(CITIES, weights=zipf_weights(len(CITIES), 0.8))[0]
+
+
+def phone(rng):
+    return f'{rng.randint(200, 999)}-{rng.randint(200, 999)}-{rng.randint(1000, 9999)}'
+
+
+def hours(start, minutes):
+    # The clock hours a show touches; shows sharing none cannot overlap.
+    first = start.replace(minute=0, second=0, microsecond=0)
+    count = math.ceil(((start - first).total_seconds() / 60 + minutes) / 60)
+    return [first + timedelta(hours=hour) for hour in range(count)]
+
+
+def booked_hours():
+    booked = set()
+    for row in db.session.query(Show.venue_id, Show.artist_id, Show.created_time,
+                                Show.duration_minutes).yield_per(BATCH_SIZE):
+        for hour in hours(row.created_time, row.duration_minutes):
+            booked.update((('venue', row.venue_id, hour), ('artist', row.artist_id, hour)))
+    return booked
+
+
+def insert(model, rows):
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.session.execute(model.__table__.insert(), rows[start:start + BATCH_SIZE])
+    db.session.commit()
+
+
+def generate(artists=1000, venues=200, shows=10000, seed=42):
+    rng = random.Random(seed)
+    now = datetime.now().replace(minute=0, second=0, microsecond=0)
+
+    venue_rows = []
+    for i in range(venues):
+        city, state = place(rng)
+        latitude, longitude = geocode(city, state)
+        venue_rows.append({
+            'name': f'The {rng.choice(WORDS)} {rng.choice(WORDS)} Room {i}',
+            'city': city,
+            'state': state,
+            'address': f'{rng.randint(1, 9999)} {rng.choice(WORDS)} St',
+            'phone': phone(rng),
+            'genres': canonical_genres(rng.sample(GENRES, rng.randint(1, 4))),
+            'facebook_link': f'https://www.facebook.com/venue{i}',
+            'seeking_talent': rng.random() < 0.3,
+            # Spread venues around the city centre (roughly +-10km).
+            'latitude': latitude + rng.uniform(-0.09, 0.09),
+            'longitude': longitude + rng.uniform(-0.09, 0.09)
+        })
+    artist_rows = []
+    for i in range(artists):
+        city, state = place(rng)
+        artist_rows.append({
+            'name': f'{rng.choice(WORDS)} {rng.choice(WORDS)} {i}',
+            'city': city,
+            'state': state,
+            'phone': phone(rng),
+            'genres': canonical_genres(rng.sample(GENRES, rng.randint(1, 3))),
+            'facebook_link': f'https://www.facebook.com/artist{i}',
+            'seeking_venue': rng.random() < 0.3
+        })
+    first_venue = (db.session.query(db.func.max(Venue.id)).scalar() or 0) + 1
+    first_artist = (db.session.query(db.func.max(Artist.id)).scalar() or 0) + 1
+    insert(Venue, venue_rows)
+    insert(Artist, artist_rows)
+
+    venue_ids = range(first_venue, first_venue + venues)
+    artist_ids = range(first_artist, first_artist + artists)
+    venue_weights = list(accumulate(zipf_weights(venues)))
+    artist_weights = list(accumulate(zipf_weights(artists)))
+    festivals = [now + timedelta(days=rng.randint(-365, 365)) for _ in range(12)]
+    # Shows never double-book a venue or artist (the database refuses it);
+    # a pick that keeps colliding is dropped, so busy venues fill up.
+    booked = booked_hours()
+    created = 0
+    for start in range(0, shows, BATCH_SIZE):
+        count = min(BATCH_SIZE, shows - start)
+        picked_venues = rng.choices(venue_ids, cum_weights=venue_weights, k=count)
+        picked_artists = rng.choices(artist_ids, cum_weights=artist_weights, k=count)
+        show_rows = []
+        for venue_id, artist_id in zip(picked_venues, picked_artists):
+            for _ in range(ATTEMPTS):
+                if rng.random() < 0.3:
+                    day = rng.choice(festivals) + timedelta(days=rng.randint(0, 2))
+                else:
+                    day = now + timedelta(days=rng.randint(-365, 365))
+                start_time = day.replace(hour=rng.randint(12, 23))
+                duration = rng.choice(DURATIONS)
+                slots = [(kind, ref_id, hour) for hour in hours(start_time, duration)
+                         for kind, ref_id in (('venue', venue_id), ('artist', artist_id))]
+                if booked.isdisjoint(slots):
+                    booked.update(slots)
+                    show_rows.append({
+                        'venue_id': venue_id,
+                        'artist_id': artist_id,
+                        'created_time': start_time,
+                        'duration_minutes': duration
+                    })
+                    break
+        insert(Show, show_rows)
+        created += len(show_rows)
+    rebuild_summaries()
+    return created
+
+
+def generate_past_shows(count):
+    """Add `count` old shows (e.g. years of history to benchmark archiving).
+
+    Rows go back in 3-hour slots from a day before the earliest show; each
+    slot books min(venues, artists) distinct venues and artists, so nothing
+    overlaps. On PostgreSQL one INSERT ... SELECT generates them.
+    """
+    venue_ids = [row.id for row in db.session.query(Venue.id).order_by(Venue.id)]
+    artist_ids = [row.id for row in db.session.query(Artist.id).order_by(Artist.id)]
+    per_slot = min(len(venue_ids), len(artist_ids))
+    if not count or not per_slot:
+        return 0
+    latest = (db.session.query(db.func.min(Show.created_time)).scalar() or datetime.now()) - timedelta(days=1)
+    latest = latest.replace(minute=0, second=0, microsecond=0)
+
+    if db.engine.dialect.name == 'postgresql':
+        db.session.execute(db.text('''
+            INSERT INTO shows (venue_id, artist_id, created_time, duration_minutes)
+            SELECT (:venue_ids)[1 + i % :per_slot],
+                   (:artist_ids)[1 + (i % :per_slot + i / :per_slot) % :artists],
+                   :latest - (i / :per_slot + 1) * interval '3 hours',
+                   120
+            FROM generate_series(0, :count - 1) AS i
+        '''), {'venue_ids': venue_ids, 'artist_ids': artist_ids, 'per_slot': per_slot,
+              'artists': len(artist_ids), 'latest': latest, 'count': count})
+        db.session.commit()
+    else:
+        for start in range(0, count, BATCH_SIZE):
+            insert(Show, [{
+                'venue_id': venue_ids[i % per_slot],
+                'artist_id': artist_ids[(i % per_slot + i // per_slot) % len(artist_ids)],
+                'created_time': latest - timedelta(hours=3 * (i // per_slot + 1)),
+                'duration_minutes': 120
+            } for i in range(start, min(start + BATCH_SIZE, count))])
+    rebuild_summaries()
+    return count
@@ -4,13 +4,58 @@ window.parseISOString = function parseISOString(s) {
 };
 
 
-deleteBtn = document.getElementById('venue.id')
-deleteBtn.onclick = function(e){
-  fetch('/venues/' + venue_id, {
-      method:"DELETE",
+document.querySelectorAll('.venue_delete').forEach(function(button) {
+  button.onclick = function(e) {
+    fetch('/venues/' + e.target.id, {
+      method: "DELETE"
+    }).then(function(response) {
+      return response.json();
+    }).then(function(data) {
+      window.location = data.homeUrl;
+    });
+  };
+});
 
-  }).then(function(){
-    item=e.target.parentElement,
-    item.remove()
-  })
-}
\ No newline at end of file
+
+// Name suggestions for the search boxes. Requests wait until typing pauses,
+// and only the answer to the latest one is shown. The show search suggests
+// venues or artists, following its "Search by" choice.
+document.querySelectorAll('input[data-autocomplete]').forEach(function(input) {
+  var list = document.createElement('datalist');
+  var timer = null;
+  var latest = 0;
+  list.id = 'autocomplete-' + input.dataset.autocomplete;
+  input.parentNode.appendChild(list);
+  input.setAttribute('list', list.id);
+  input.setAttribute('autocomplete', 'off');
+
+  input.addEventListener('input', function() {
+    clearTimeout(timer);
+    timer = setTimeout(function() {
+      var q = input.value.trim();
+      var type = input.dataset.autocomplete;
+      var request = ++latest;
+      if (type === 'show') {
+        var checked = input.form.querySelector('input[name="filter_by"]:checked');
+        type = checked ? checked.value : 'venue';
+      }
+      if (!q) {
+        list.innerHTML = '';
+        return;
+      }
+      fetch('/autocomplete?type=' + type + '&q=' + encodeURIComponent(q)).then(function(response) {
+        return response.json();
+      }).then(function(data) {
+        if (request !== latest) {
+          return;
+        }
+        list.innerHTML = '';
+        data.results.forEach(function(result) {
+          var option = document.createElement('option');
+          option.value = result.name;
+          list.appendChild(option);
+        });
+      });
+    }, 200);
+  });
+});
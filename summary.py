@@ -0,0 +1,92 @@
+from datetime import datetime
+from models import Venue, Show, ShowHistory, Artist, db
+
+#----------------------------------------------------------------------------#
+# Show summaries.
+#----------------------------------------------------------------------------#
+# Venue and Artist carry denormalized upcoming_count, past_count and
+# next_show_at columns so listings read counts without touching `shows`.
+# They are bumped when a show is created, recomputed for the rows a delete
+# touches, and rolled forward periodically as upcoming shows become past ones.
+# past_count includes the shows archived into show_history.
+
+SHOW_COLUMNS = {
+    Venue: Show.venue_id,
+    Artist: Show.artist_id
+}
+
+HISTORY_COLUMNS = {
+    Venue: ShowHistory.venue_id,
+    Artist: ShowHistory.artist_id
+}
+
+
+def record_show(venue_id, artist_id, start_time):
+    # Call in the same transaction as the insert of the show.
+    for model, ref_id in ((Venue, venue_id), (Artist, artist_id)):
+        if start_time > datetime.now():
+            values = {
+                model.upcoming_count: model.upcoming_count + 1,
+                model.next_show_at: db.case(
+                    (db.or_(model.next_show_at.is_(None), model.next_show_at > start_time), start_time),
+                    else_=model.next_show_at
+                )
+            }
+        else:
+            values = {model.past_count: model.past_count + 1}
+        model.query.filter(model.id == ref_id).update(values, synchronize_session=False)
+
+
+def computed_summary(model, now=None):
+    # Correlated subqueries computing the summary columns from `shows` (and
+    # show_history for the past count).
+    now = now or datetime.now()
+    column = SHOW_COLUMNS[model]
+    return {
+        model.upcoming_count: db.select(db.func.count(Show.id)).where(
+            column == model.id, Show.created_time > now).scalar_subquery(),
+        model.past_count: db.select(db.func.count(Show.id)).where(
+            column == model.id, Show.created_time <= now).scalar_subquery()
+            + db.select(db.func.count(ShowHistory.id)).where(
+            HISTORY_COLUMNS[model] == model.id).scalar_subquery(),
+        model.next_show_at: db.select(db.func.min(Show.created_time)).where(
+            column == model.id, Show.created_time > now).scalar_subquery()
+    }
+
+
+def refresh_summaries(model, ids=None):
+    query = model.query
+    if ids is not None:
+        if not ids:
+            return 0
+        query = query.filter(model.id.in_(ids))
+    return query.update(computed_summary(model), synchronize_session=False)
+
+
+def roll_forward():
+    # Only rows whose next show has started can be out of date.
+    now = datetime.now()
+    updated = 0
+    for model in SHOW_COLUMNS:
+        updated += model.query.filter(model.next_show_at <= now).update(
+            computed_summary(model, now), synchronize_session=False)
+    db.session.commit()
+    return updated
+
+
+def check_summaries(model):
+    # Ids whose stored summary differs from one computed from scratch.
+    computed = computed_summary(model)
+    rows = db.session.query(model.id).filter(db.or_(
+        model.upcoming_count != computed[model.upcoming_count],
+        model.past_count != computed[model.past_count],
+        db.func.coalesce(model.next_show_at, datetime.min) !=
+            db.func.coalesce(computed[model.next_show_at], datetime.min)
+    ))
+    return [row.id for row in rows]
+
+
+def rebuild_summaries():
+    updated = sum(refresh_summaries(model) for model in SHOW_COLUMNS)
+    db.session.commit()
+    return updated
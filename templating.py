@@ -0,0 +1,39 @@
+import os
+import stat
+from jinja2 import FileSystemBytecodeCache
+
+#----------------------------------------------------------------------------#
+# Template compilation.
+#----------------------------------------------------------------------------#
+# Jinja compiles a template to Python bytecode the first time it is loaded.
+# The bytecode cache keeps that work on disk across processes and deploys
+# (entries are keyed by a checksum of the source, so an edited template is
+# simply recompiled), and precompile() loads every template up front.
+
+def private_directory(path):
+    # The cache holds code that is unmarshalled and run, so a directory that
+    # another user owns or can write to is refused rather than used.
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise RuntimeError(
+            f'TEMPLATE_CACHE_DIR {path} must be a directory owned by this user with mode 0700')
+    return path
+
+
+def init_templates(app):
+    cache_dir = app.config.get('TEMPLATE_CACHE_DIR')
+    if cache_dir:
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(private_directory(cache_dir))
+    else:
+        # Jinja's default: a per-user directory it creates 0700 and checks.
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache()
+    if app.config.get('TEMPLATE_PRECOMPILE'):
+        precompile(app)
+
+
+def precompile(app):
+    names = app.jinja_env.list_templates(extensions=['html'])
+    for name in names:
+        app.jinja_env.get_template(name)
+    return names
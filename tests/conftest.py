@@ -0,0 +1,74 @@
+import os
+import shutil
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from models import db as _db
+from seed import generate
+
+#----------------------------------------------------------------------------#
+# Fixtures.
+#----------------------------------------------------------------------------#
+# Each test gets an app built by create_app() on its own SQLite file, with the
+# schema created from the models. Queries take their non-PostgreSQL paths.
+# `seeded_app` starts from a copy of a database filled once per session by
+# seed.generate(), so tests can change it freely.
+
+class TestConfig:
+    SECRET_KEY = 'test'
+    TESTING = True
+    # Keeps create_app() from logging to error.log.
+    DEBUG = True
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    WTF_CSRF_ENABLED = False
+    TEMPLATE_PRECOMPILE = False
+
+
+def make_app(directory):
+    class Config(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{directory / "fyyur.db"}'
+        ASSETS_DIR = str(directory / 'assets')
+    return create_app(Config)
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = make_app(tmp_path)
+    with app.app_context():
+        _db.create_all()
+        yield app
+        _db.session.remove()
+
+
+@pytest.fixture(scope='session')
+def seeded_database(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('seed')
+    app = make_app(directory)
+    with app.app_context():
+        _db.create_all()
+        generate(artists=200, venues=40, shows=1000)
+        _db.session.remove()
+        _db.get_engine(app).dispose()
+    return directory / 'fyyur.db'
+
+
+@pytest.fixture
+def seeded_app(seeded_database, tmp_path):
+    shutil.copy(seeded_database, tmp_path / 'fyyur.db')
+    app = make_app(tmp_path)
+    with app.app_context():
+        yield app
+        _db.session.remove()
+
+
+@pytest.fixture
+def db(app):
+    return _db
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
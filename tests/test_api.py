@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+import pytest
+from models import Venue, Show, Artist
+from archive import archive_shows
+
+NOW = datetime.now().replace(microsecond=0)
+
+
+@pytest.fixture
+def listed(db):
+    # Venue 1 lists one show by artist 1 (archived below) and one by artist 2.
+    db.session.add_all([Venue(id=1, name='Room'), Artist(id=1, name='Old Name'),
+                        Artist(id=2, name='Regular')])
+    db.session.add_all([
+        Show(artist_id=1, venue_id=1, created_time=NOW - timedelta(days=200)),
+        Show(artist_id=2, venue_id=1, created_time=NOW + timedelta(days=10))
+    ])
+    db.session.commit()
+    archive_shows(NOW - timedelta(days=90))
+
+
+def test_venue_detail_answers_304_to_its_etag(client, listed):
+    response = client.get('/api/v1/venues/1')
+    etag = response.headers['ETag']
+    assert response.status_code == 200
+    assert response.json['past_shows'][0]['artist_name'] == 'Old Name'
+
+    cached = client.get('/api/v1/venues/1', headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.headers['ETag'] == etag
+
+
+def test_venue_etag_changes_with_an_archived_artist(client, db, listed):
+    etag = client.get('/api/v1/venues/1').headers['ETag']
+    response = client.post('/artists/1/edit', data={
+        'name': 'New Name', 'city': 'Austin', 'state': 'TX', 'phone': '512-555-0101',
+        'genres': ['Jazz'], 'image_link': '', 'facebook_link': 'https://www.facebook.com/newname',
+        'website_link': '', 'seeking_description': ''})
+    assert response.status_code == 302
+    assert db.session.get(Artist, 1).name == 'New Name'
+
+    response = client.get('/api/v1/venues/1', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.json['past_shows'][0]['artist_name'] == 'New Name'
+
+
+def test_venue_etag_changes_when_a_show_is_archived(client, db):
+    db.session.add_all([Venue(id=1, name='Room'), Artist(id=1, name='Artist')])
+    db.session.add(Show(artist_id=1, venue_id=1, created_time=NOW - timedelta(days=200)))
+    db.session.commit()
+    etag = client.get('/api/v1/venues/1').headers['ETag']
+    archive_shows(NOW - timedelta(days=90))
+    assert client.get('/api/v1/venues/1', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_missing_venue_detail(client, db):
+    assert client.get('/api/v1/venues/999').status_code == 404
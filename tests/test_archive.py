@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+import pytest
+from models import Venue, Show, ShowHistory, Artist
+from archive import archive_shows, remove_venue
+from queries import PAST_SHOWS_LIMIT, venue_detail, artist_detail
+from summary import rebuild_summaries
+
+NOW = datetime.now().replace(microsecond=0)
+
+
+@pytest.fixture
+def history(db):
+    db.session.add_all([Venue(id=1, name='Old Venue'), Venue(id=2, name='New Venue'),
+                        Artist(id=1, name='Artist')])
+    db.session.add_all([
+        Show(artist_id=1, venue_id=1, created_time=NOW - timedelta(days=400)),
+        Show(artist_id=1, venue_id=1, created_time=NOW - timedelta(days=200)),
+        Show(artist_id=1, venue_id=2, created_time=NOW - timedelta(days=10)),
+        Show(artist_id=1, venue_id=2, created_time=NOW + timedelta(days=10))
+    ])
+    db.session.commit()
+    rebuild_summaries()
+
+
+def test_archive_shows_moves_old_shows_off_postgresql(db, history):
+    assert db.engine.dialect.name == 'sqlite'
+    assert archive_shows(NOW - timedelta(days=90)) == 2
+    assert db.session.query(Show).count() == 2
+    archived = db.session.query(ShowHistory).order_by(ShowHistory.created_time).all()
+    assert [show.created_time for show in archived] == [NOW - timedelta(days=400), NOW - timedelta(days=200)]
+    assert all(show.duration_minutes == 120 and show.updated_at for show in archived)
+    # Nothing left to move.
+    assert archive_shows(NOW - timedelta(days=90)) == 0
+
+
+def test_pages_list_archived_past_shows(db, history):
+    archive_shows(NOW - timedelta(days=90))
+    venue = venue_detail(1)
+    assert venue['past_shows_count'] == 2
+    assert [show['start_time'] for show in venue['past_shows']] == [
+        NOW - timedelta(days=400), NOW - timedelta(days=200)]
+    artist = artist_detail(1)
+    assert artist['past_shows_count'] == 3
+    assert artist['upcoming_shows_count'] == 1
+    assert db.session.get(Artist, 1).past_count == 3
+
+
+def test_remove_venue_deletes_live_and_archived_shows(db, history):
+    archive_shows(NOW - timedelta(days=90))
+    assert remove_venue(1) == [1]
+    db.session.commit()
+    assert db.session.get(Venue, 1) is None
+    assert db.session.query(ShowHistory).count() == 0
+    assert db.session.get(Artist, 1).past_count == 1
+
+
+def test_pages_list_the_latest_past_shows_and_count_all_of_them(db, history):
+    db.session.add_all(Show(artist_id=1, venue_id=1, created_time=NOW - timedelta(days=300 - i))
+                       for i in range(PAST_SHOWS_LIMIT))
+    db.session.add(Show(artist_id=1, venue_id=1, created_time=NOW + timedelta(days=5)))
+    db.session.commit()
+    archive_shows(NOW - timedelta(days=90))
+    venue = venue_detail(1)
+    assert venue['past_shows_count'] == PAST_SHOWS_LIMIT + 2
+    assert len(venue['past_shows']) == PAST_SHOWS_LIMIT
+    starts = [show['start_time'] for show in venue['past_shows']]
+    assert starts == sorted(starts)
+    assert starts[-1] == NOW - timedelta(days=200)
+    assert NOW - timedelta(days=400) not in starts
+    assert [show['start_time'] for show in venue['upcoming_shows']] == [NOW + timedelta(days=5)]
@@ -0,0 +1,28 @@
+import pytest
+import assets
+from assets import build
+
+
+@pytest.fixture
+def no_rcssmin(monkeypatch):
+    monkeypatch.setattr(assets, 'rcssmin', None)
+
+
+def test_minify_css_fallback_keeps_strings(no_rcssmin):
+    text = 'a > b , c { content : "a , b > c" ; }\n/* gone */ d::after { content: \'x ; }\' }'
+    assert assets.minify_css(text) == 'a>b,c{content : "a , b > c"}d::after{content: \'x ; }\'}'
+
+
+def test_minify_css_fallback_keeps_licence_comments(no_rcssmin):
+    assert assets.minify_css('/*! (c) it\'s ours */\na { }\n/* it\'s not */ b { }') == \
+        "/*! (c) it's ours */ a{}b{}"
+
+
+@pytest.mark.parametrize('output', ['elsewhere', 'static', 'static/../elsewhere'])
+def test_build_only_replaces_a_directory_inside_static(tmp_path, output):
+    (tmp_path / 'static').mkdir()
+    (tmp_path / 'elsewhere').mkdir()
+    (tmp_path / 'elsewhere' / 'keep.txt').write_text('keep')
+    with pytest.raises(ValueError):
+        build(str(tmp_path / 'static'), str(tmp_path / output))
+    assert (tmp_path / 'elsewhere' / 'keep.txt').exists()
@@ -0,0 +1,44 @@
+from autocomplete import PrefixIndex
+
+
+def names(results):
+    return [result['name'] for result in results]
+
+
+def test_search_matches_any_word():
+    index = PrefixIndex()
+    index.reset([(1, 'The Blue Room'), (2, 'Blues Hall'), (3, 'Red Room')])
+    assert sorted(names(index.search('blu'))) == ['Blues Hall', 'The Blue Room']
+    assert sorted(names(index.search('ROOM'))) == ['Red Room', 'The Blue Room']
+    assert names(index.search('blue room')) == ['The Blue Room']
+    assert index.search('green') == []
+
+
+def test_search_ignores_blank_prefixes_and_empty_names():
+    index = PrefixIndex()
+    index.reset([(1, 'The Blue Room'), (2, None), (3, '')])
+    assert index.search('') == []
+    assert index.search('   ') == []
+    assert index.names == {1: 'The Blue Room'}
+
+
+def test_search_limit_counts_names_not_keys():
+    index = PrefixIndex()
+    index.reset([(i, f'Room {i} Room') for i in range(20)])
+    results = index.search('room', limit=5)
+    assert len(results) == 5
+    assert len({result['id'] for result in results}) == 5
+
+
+def test_add_renames_and_remove_forgets():
+    index = PrefixIndex()
+    index.reset([(1, 'The Blue Room')])
+    index.add(1, 'Green Door')
+    assert index.search('blue') == []
+    assert index.search('door') == [{'id': 1, 'name': 'Green Door'}]
+    index.add(2, 'Green Mill')
+    assert sorted(names(index.search('green'))) == ['Green Door', 'Green Mill']
+    index.remove(1)
+    assert names(index.search('green')) == ['Green Mill']
+    index.remove(99)
+    assert index.entries == sorted(index.entries)
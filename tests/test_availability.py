@@ -0,0 +1,36 @@
+import random
+from datetime import datetime, timedelta
+from availability import IntervalTree
+
+
+def test_overlapping_matches_brute_force():
+    rng = random.Random(3)
+    intervals = []
+    for key in range(300):
+        start = rng.randint(0, 1000)
+        intervals.append((start, start + rng.randint(1, 50), key))
+    tree = IntervalTree(intervals)
+    for _ in range(200):
+        start = rng.randint(-20, 1050)
+        end = start + rng.randint(1, 80)
+        expected = sorted(interval for interval in intervals if interval[0] < end and start < interval[1])
+        assert tree.overlapping(start, end) == expected
+
+
+def test_overlapping_is_half_open():
+    tree = IntervalTree([(10, 20, 'a'), (20, 30, 'b')])
+    assert tree.overlapping(20, 25) == [(20, 30, 'b')]
+    assert tree.overlapping(0, 10) == []
+    assert tree.overlapping(19, 21) == [(10, 20, 'a'), (20, 30, 'b')]
+
+
+def test_overlapping_datetimes():
+    start = datetime(2030, 1, 1, 20)
+    tree = IntervalTree([(start, start + timedelta(hours=2), 1)])
+    assert tree.overlapping(start + timedelta(hours=1), start + timedelta(hours=3)) == [
+        (start, start + timedelta(hours=2), 1)]
+    assert tree.overlapping(start + timedelta(hours=2), start + timedelta(hours=3)) == []
+
+
+def test_overlapping_empty_tree():
+    assert IntervalTree([]).overlapping(0, 10) == []
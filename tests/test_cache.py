@@ -0,0 +1,56 @@
+import threading
+from datetime import datetime, timedelta
+from cache import CacheState, MemoryBackend
+from models import Venue, Show, Artist
+
+VENUE_FORM = {
+    'name': 'Renamed Room',
+    'city': 'Austin',
+    'state': 'TX',
+    'address': '1 Main St',
+    'phone': '512-555-0100',
+    'genres': ['Jazz'],
+    'image_link': '',
+    'facebook_link': 'https://www.facebook.com/room',
+    'website_link': '',
+    'seeking_description': ''
+}
+
+
+def test_counters_add_up_across_threads():
+    state = CacheState(MemoryBackend(), 300)
+    keys = [f'key:{i}' for i in range(100)]
+
+    def lookups():
+        for _ in range(50):
+            for key in keys:
+                state.get_or_set(key, lambda: 1)
+
+    threads = [threading.Thread(target=lookups) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = state.stats()
+    assert stats['hits'] + stats['misses'] == 8 * 50 * len(keys)
+    assert stats['misses'] >= len(keys)
+
+
+def test_editing_a_venue_drops_its_cached_pages(app, db, client):
+    db.session.add_all([Venue(id=1, name='Old Room', city='Austin', state='TX', genres=['Jazz']),
+                        Artist(id=1, name='Trio', city='Austin', state='TX', genres=['Jazz'])])
+    db.session.add(Show(artist_id=1, venue_id=1, created_time=datetime.now() + timedelta(days=3)))
+    db.session.commit()
+    assert b'Old Room' in client.get('/venues/1').data
+    assert b'Old Room' in client.get('/artists/1').data
+    assert b'Old Room' in client.get('/venues').data
+    stats = app.extensions['cache'].stats()
+    # Served from the cache now.
+    assert b'Old Room' in client.get('/venues/1').data
+    assert app.extensions['cache'].stats()['hits'] > stats['hits']
+
+    assert client.post('/venues/1/edit', data=VENUE_FORM).status_code == 302
+    assert db.session.get(Venue, 1).name == 'Renamed Room'
+    for path in ('/venues/1', '/artists/1', '/venues'):
+        page = client.get(path).data
+        assert b'Renamed Room' in page and b'Old Room' not in page
@@ -0,0 +1,39 @@
+import math
+import random
+from geo import EARTH_RADIUS_KM, KDTree
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def test_within_matches_brute_force():
+    rng = random.Random(7)
+    points = [(key, rng.uniform(-60, 60), rng.uniform(-180, 180)) for key in range(500)]
+    tree = KDTree(points)
+    for _ in range(50):
+        lat, lng, radius = rng.uniform(-60, 60), rng.uniform(-180, 180), rng.choice([10, 500, 2000, 8000])
+        expected = {key for key, p_lat, p_lng in points if haversine_km(lat, lng, p_lat, p_lng) <= radius}
+        found = tree.within(lat, lng, radius)
+        # Points within a metre of the edge may land either side.
+        edge = {key for key, p_lat, p_lng in points if abs(haversine_km(lat, lng, p_lat, p_lng) - radius) < 0.001}
+        assert {key for _, key in found} ^ expected <= edge
+
+
+def test_within_sorts_by_distance():
+    tree = KDTree([('sf', 37.77, -122.42), ('oakland', 37.80, -122.27), ('la', 34.05, -118.24)])
+    found = tree.within(37.77, -122.42, 1000)
+    assert [key for _, key in found] == ['sf', 'oakland', 'la']
+    assert found[0][0] == 0
+    assert math.isclose(found[1][0], haversine_km(37.77, -122.42, 37.80, -122.27), rel_tol=1e-9)
+
+
+def test_within_crosses_the_antimeridian():
+    tree = KDTree([('west', 0, 179.9), ('east', 0, -179.9), ('far', 0, 90)])
+    assert {key for _, key in tree.within(0, 180, 50)} == {'west', 'east'}
+
+
+def test_within_empty_tree():
+    assert KDTree([]).within(0, 0, 100) == []
@@ -0,0 +1,42 @@
+import pytest
+from models import Artist
+from importer import import_rows, to_formdata
+
+ROW = {
+    'name': 'Trio',
+    'city': 'Austin',
+    'state': 'TX',
+    'phone': '512-555-0100',
+    'genres': 'jazz, rnb',
+    'facebook_link': 'https://www.facebook.com/trio',
+    'seeking_venue': 'true'
+}
+
+
+def test_to_formdata_canonicalizes_genres():
+    assert to_formdata(ROW).getlist('genres') == ['Jazz', 'R&B']
+    assert to_formdata(dict(ROW, genres=['Other', 'hip hop'])).getlist('genres') == ['Hip-Hop', 'Other']
+
+
+def test_to_formdata_rejects_unknown_genres():
+    with pytest.raises(ValueError, match="unknown genre 'polka'"):
+        to_formdata(dict(ROW, genres='Jazz,polka'))
+
+
+def test_import_reports_bad_rows_and_keeps_the_rest(db):
+    rows = [
+        ROW,
+        dict(ROW, name='Polka Band', genres='polka'),
+        dict(ROW, name='Nowhere', state='ZZ'),
+        dict(ROW, name='Duo', seeking_venue='false', facebook_link='https://www.facebook.com/duo')
+    ]
+    imported, errors = import_rows('artists', rows)
+    assert imported == 2
+    assert [row_number for row_number, _ in errors] == [2, 3]
+    assert "unknown genre 'polka'" in errors[0][1]
+    assert errors[1][1].startswith('state:')
+    # Rows share one form: nothing carries over from the row before.
+    artists = {artist.name: artist for artist in db.session.query(Artist)}
+    assert set(artists) == {'Trio', 'Duo'}
+    assert artists['Trio'].seeking_venue and not artists['Duo'].seeking_venue
+    assert artists['Duo'].facebook_link == 'https://www.facebook.com/duo'
@@ -0,0 +1,60 @@
+from datetime import datetime
+import pytest
+from models import Venue, Artist
+from queries import encode_cursor, decode_cursor, venues_near, genre_browse
+
+
+def test_decode_cursor_round_trips():
+    start_time = datetime(2030, 5, 17, 21, 30, 15, 123456)
+    assert decode_cursor(encode_cursor(start_time, 42)) == (start_time, 42)
+    assert decode_cursor(encode_cursor(datetime(2030, 5, 17, 21), 7)) == (datetime(2030, 5, 17, 21), 7)
+
+
+@pytest.mark.parametrize('cursor', ['', 'nonsense', '2030-05-17T21:00:00_x', 'x_1'])
+def test_decode_cursor_rejects_garbage(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_venues_near_uses_the_kdtree(db):
+    db.session.add_all([
+        Venue(name='Mission', city='San Francisco', state='CA'),
+        Venue(name='Lake Merritt', city='Oakland', state='CA'),
+        Venue(name='Sunset', city='Los Angeles', state='CA'),
+        Venue(name='Nowhere', city='Atlantis', state='ZZ')
+    ])
+    db.session.commit()
+    assert db.engine.dialect.name == 'sqlite'
+
+    near = venues_near(37.77, -122.42, 50)
+    assert [venue['name'] for venue in near] == ['Mission', 'Lake Merritt']
+    assert near[0]['distance_km'] <= near[1]['distance_km'] < 50
+    assert set(near[0]) == {'id', 'name', 'city', 'state', 'distance_km', 'num_upcoming_shows'}
+    assert len(venues_near(37.77, -122.42, 1000, limit=1)) == 1
+    assert [venue['name'] for venue in venues_near(37.77, -122.42, 1000)] == ['Mission', 'Lake Merritt', 'Sunset']
+
+
+def test_genre_browse_filters_in_python(db):
+    db.session.add_all([
+        Artist(name='Alpha', genres=['Jazz', 'Blues']),
+        Artist(name='Bravo', genres=['Jazz']),
+        Artist(name='Charlie', genres=['Rock n Roll']),
+        Artist(name='Delta', genres=None)
+    ])
+    db.session.commit()
+
+    everything = genre_browse(Artist, [])
+    assert everything['count'] == 4
+    assert everything['facets'] == {'Jazz': 2, 'Blues': 1, 'Rock n Roll': 1}
+
+    jazz = genre_browse(Artist, ['Jazz'])
+    assert jazz['count'] == 2
+    assert [row['name'] for row in jazz['data']] == ['Alpha', 'Bravo']
+    assert jazz['facets'] == {'Jazz': 2, 'Blues': 1}
+
+    both = genre_browse(Artist, ['Jazz', 'Blues'])
+    assert [row['name'] for row in both['data']] == ['Alpha']
+
+    page = genre_browse(Artist, ['Jazz'], limit=1, offset=1)
+    assert page['count'] == 2
+    assert [row['name'] for row in page['data']] == ['Bravo']
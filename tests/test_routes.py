@@ -0,0 +1,286 @@
+import csv
+import io
+import itertools
+import json
+from datetime import datetime, timedelta
+import pytest
+from models import Venue, Show, ShowHistory, Artist, db
+from queries import encode_cursor
+
+#----------------------------------------------------------------------------#
+# Route benchmarks.
+#----------------------------------------------------------------------------#
+# Every page of app.py through the test client, timed by pytest-benchmark on
+# the seeded database (compare runs with --benchmark-autosave and
+# --benchmark-compare; --benchmark-disable runs each once, as plain tests).
+# The response cache is cleared before every round, so reads are timed on the
+# database path; writes get fresh rows from their setup.
+
+ROUNDS = 10
+
+VENUE_FORM = {
+    'name': 'The Test Room',
+    'city': 'Austin',
+    'state': 'TX',
+    'address': '1 Main St',
+    'phone': '512-555-0100',
+    'genres': ['Jazz', 'Blues'],
+    'image_link': '',
+    'facebook_link': 'https://www.facebook.com/testroom',
+    'website_link': '',
+    'seeking_talent': 'y',
+    'seeking_description': 'Jazz trios'
+}
+ARTIST_FORM = {
+    'name': 'The Test Trio',
+    'city': 'Austin',
+    'state': 'TX',
+    'phone': '512-555-0101',
+    'genres': ['Jazz'],
+    'image_link': '',
+    'facebook_link': 'https://www.facebook.com/testtrio',
+    'website_link': '',
+    'seeking_venue': 'y',
+    'seeking_description': 'Small rooms'
+}
+
+
+@pytest.fixture
+def client(seeded_app):
+    return seeded_app.test_client()
+
+
+@pytest.fixture
+def bench(benchmark, seeded_app, client):
+    # bench(method, path, **kwargs) -> the last response; `setup` returns
+    # fresh open() arguments for every round instead. bench.calls counts the
+    # requests sent (one per round, or one in all with --benchmark-disable).
+    cache = seeded_app.extensions['cache']
+
+    def send(*args, **kwargs):
+        run.calls += 1
+        return client.open(*args, **kwargs)
+
+    def run(method, path, setup=None, **kwargs):
+        def arguments():
+            cache.clear()
+            return ((), setup()) if setup else None
+        return benchmark.pedantic(send, args=() if setup else (path,),
+                                  kwargs={} if setup else dict(kwargs, method=method),
+                                  setup=arguments, rounds=ROUNDS)
+    run.calls = 0
+    return run
+
+
+def open_slots():
+    # Start times no seeded show reaches: three hours apart, two years out.
+    start = datetime.now().replace(second=0, microsecond=0) + timedelta(days=730)
+    return (start + timedelta(hours=3 * i) for i in itertools.count())
+
+
+def first_id(model):
+    return db.session.query(db.func.min(model.id)).scalar()
+
+
+# Reads.
+
+@pytest.mark.parametrize('path', [
+    '/',
+    '/venues',
+    '/artists',
+    '/shows',
+    '/venues/create',
+    '/artists/create',
+    '/shows/create',
+    '/shows/bulk',
+    '/cache/stats'
+])
+def test_page(bench, path):
+    assert bench('GET', path).status_code == 200
+
+
+def test_shows_next_page(bench):
+    start, show_id = db.session.query(Show.created_time, Show.id).order_by(Show.created_time, Show.id).first()
+    response = bench('GET', f'/shows?after={encode_cursor(start, show_id)}')
+    assert response.status_code == 200
+
+
+def test_show_venue(bench):
+    response = bench('GET', f'/venues/{first_id(Venue)}')
+    assert response.status_code == 200
+    assert b'Past Show' in response.data
+
+
+def test_show_venue_with_archived_shows(bench):
+    venue_id = first_id(Venue)
+    artist_id = first_id(Artist)
+    start = datetime(2001, 1, 1, 20)
+    db.session.add_all(ShowHistory(id=-i, artist_id=artist_id, venue_id=venue_id, duration_minutes=60,
+                                   created_time=start + timedelta(days=i), updated_at=start)
+                       for i in range(1, 51))
+    db.session.commit()
+    response = bench('GET', f'/venues/{venue_id}')
+    assert response.status_code == 200
+    assert b'most recent' in response.data
+
+
+def test_show_artist(bench):
+    assert bench('GET', f'/artists/{first_id(Artist)}').status_code == 200
+
+
+def test_missing_venue(bench):
+    assert bench('GET', '/venues/999999').status_code == 404
+
+
+def test_edit_venue_form(bench):
+    response = bench('GET', f'/venues/{first_id(Venue)}/edit')
+    assert response.status_code == 200
+
+
+def test_edit_artist_form(bench):
+    response = bench('GET', f'/artists/{first_id(Artist)}/edit')
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize('path, data', [
+    ('/venues/search', {'search_term': 'room'}),
+    ('/artists/search', {'search_term': 'blue'}),
+    ('/shows/search', {'search_term': 'blue', 'filter_by': 'artist'}),
+    ('/shows/search', {'search_term': 'room', 'filter_by': 'venue'})
+])
+def test_search(bench, path, data):
+    response = bench('POST', path, data=data)
+    assert response.status_code == 200
+    assert b'Number of search results' in response.data
+
+
+def test_venues_near(bench):
+    response = bench('GET', '/venues/near?lat=30.27&lng=-97.74&radius=100')
+    assert response.status_code == 200
+    assert all(venue['distance_km'] <= 100 for venue in response.json)
+
+
+@pytest.mark.parametrize('query', ['', '?lat=91&lng=0', '?lat=0&lng=0&radius=5000'])
+def test_venues_near_rejects_bad_arguments(client, query):
+    assert client.get(f'/venues/near{query}').status_code == 400
+
+
+def test_autocomplete(bench):
+    response = bench('GET', '/autocomplete?type=venue&q=the')
+    assert response.status_code == 200
+    assert response.json['results']
+
+
+@pytest.mark.parametrize('kind', ['artists', 'venues', 'shows'])
+@pytest.mark.parametrize('fmt', ['ndjson', 'csv'])
+def test_export(benchmark, client, kind, fmt):
+    def export():
+        response = client.get(f'/export/{kind}?format={fmt}')
+        return response, response.get_data(as_text=True)
+
+    response, body = benchmark.pedantic(export, rounds=ROUNDS)
+    assert response.status_code == 200
+    count = db.session.query({'artists': Artist, 'venues': Venue, 'shows': Show}[kind]).count()
+    if fmt == 'csv':
+        assert len(list(csv.DictReader(io.StringIO(body)))) == count
+    else:
+        lines = body.splitlines()
+        assert len(lines) == count
+        assert 'id' in json.loads(lines[0])
+
+
+def test_export_gzip(client):
+    response = client.get('/export/artists', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+
+
+# Writes.
+
+def test_create_venue(bench):
+    before = db.session.query(Venue).count()
+    assert bench('POST', '/venues/create', data=VENUE_FORM).status_code == 302
+    assert db.session.query(Venue).count() == before + bench.calls
+
+
+def test_create_artist(bench):
+    before = db.session.query(Artist).count()
+    assert bench('POST', '/artists/create', data=ARTIST_FORM).status_code == 302
+    assert db.session.query(Artist).count() == before + bench.calls
+
+
+def test_edit_venue(bench):
+    venue_id = first_id(Venue)
+    response = bench('POST', f'/venues/{venue_id}/edit', data=dict(VENUE_FORM, name='Renamed Room'))
+    assert response.status_code == 302
+    assert db.session.get(Venue, venue_id).name == 'Renamed Room'
+
+
+def test_edit_artist(bench):
+    artist_id = first_id(Artist)
+    response = bench('POST', f'/artists/{artist_id}/edit', data=dict(ARTIST_FORM, name='Renamed Trio'))
+    assert response.status_code == 302
+    assert db.session.get(Artist, artist_id).name == 'Renamed Trio'
+
+
+def test_delete_venue(bench):
+    artist_id = first_id(Artist)
+    slots = open_slots()
+
+    def venue_with_a_show():
+        venue = Venue(name='Doomed Room', city='Austin', state='TX')
+        db.session.add(venue)
+        db.session.flush()
+        db.session.add(Show(artist_id=artist_id, venue_id=venue.id, created_time=next(slots)))
+        db.session.commit()
+        return {'path': f'/venues/{venue.id}', 'method': 'DELETE'}
+
+    assert bench('DELETE', None, setup=venue_with_a_show).status_code == 200
+    assert db.session.query(Venue).filter(Venue.name == 'Doomed Room').count() == 0
+
+
+def test_create_show(bench):
+    artist_id, venue_id = first_id(Artist), first_id(Venue)
+    slots = open_slots()
+    before = db.session.query(Show).count()
+
+    def next_show():
+        return {'path': '/shows/create', 'method': 'POST', 'data': {
+            'artist_id': artist_id, 'venue_id': venue_id,
+            'start_time': next(slots).isoformat(sep=' '), 'duration': 60}}
+
+    assert bench('POST', None, setup=next_show).status_code == 302
+    assert db.session.query(Show).count() == before + bench.calls
+
+
+def test_create_show_conflict(client):
+    show = db.session.query(Show).first()
+    response = client.post('/shows/create', data={
+        'artist_id': show.artist_id, 'venue_id': show.venue_id,
+        'start_time': show.created_time.isoformat(sep=' ')})
+    assert response.status_code == 409
+
+
+def test_bulk_shows(bench):
+    artist_ids = [row.id for row in db.session.query(Artist.id).order_by(Artist.id).limit(10)]
+    venue_ids = [row.id for row in db.session.query(Venue.id).order_by(Venue.id).limit(10)]
+    slots = open_slots()
+    before = db.session.query(Show).count()
+
+    def tour():
+        start = next(slots)
+        lines = [f'{artist_id},{venue_id},{start:%Y-%m-%d %H:%M},90'
+                 for artist_id, venue_id in zip(artist_ids, venue_ids)]
+        return {'path': '/shows/bulk', 'method': 'POST', 'data': {'shows': '\n'.join(lines)}}
+
+    assert bench('POST', None, setup=tour).status_code == 302
+    assert db.session.query(Show).count() == before + bench.calls * len(artist_ids)
+
+
+def test_bulk_shows_returns_the_failed_lines(client):
+    show = db.session.query(Show).first()
+    response = client.post('/shows/bulk', data={'shows': '\n'.join([
+        f'{show.artist_id},{show.venue_id},{show.created_time:%Y-%m-%d %H:%M}',
+        '999999,1,2040-01-01 20:00'
+    ])})
+    assert response.status_code == 422
+    assert b'999999' in response.data
@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+import pytest
+from models import Venue, Show, Artist
+from scheduling import schedule_shows
+
+START = datetime.now().replace(microsecond=0) + timedelta(days=30)
+
+
+@pytest.fixture
+def booked(db):
+    db.session.add_all([Venue(id=1, name='Venue'), Artist(id=1, name='One'), Artist(id=2, name='Two')])
+    db.session.add(Show(artist_id=1, venue_id=1, created_time=START, duration_minutes=120))
+    db.session.commit()
+
+
+def row(artist_id, start, duration=60, venue_id=1):
+    return {'artist_id': str(artist_id), 'venue_id': str(venue_id),
+            'start_time': start.strftime('%Y-%m-%d %H:%M:%S'), 'duration': str(duration)}
+
+
+def test_schedule_shows_inserts_row_by_row_off_postgresql(db, booked):
+    assert db.engine.dialect.name == 'sqlite'
+    shows, errors = schedule_shows([
+        row(2, START + timedelta(hours=3)),
+        row(2, START + timedelta(hours=5))
+    ])
+    assert errors == []
+    assert [row_number for row_number, _ in shows] == [1, 2]
+    ids = [values['id'] for _, values in shows]
+    assert sorted(ids) == sorted(id_ for id_, in db.session.query(Show.id).filter(Show.artist_id == 2))
+    assert db.session.get(Venue, 1).upcoming_count == 3
+    assert db.session.get(Artist, 2).upcoming_count == 2
+
+
+def test_schedule_shows_reports_conflicts_and_books_the_rest(db, booked):
+    shows, errors = schedule_shows([
+        row(2, START + timedelta(hours=1)),
+        row(2, START + timedelta(hours=4)),
+        row(2, START + timedelta(hours=4, minutes=30), venue_id=1),
+        row(3, START + timedelta(hours=8)),
+        {'artist_id': '2', 'venue_id': '1', 'start_time': 'soon'}
+    ])
+    assert [row_number for row_number, _ in shows] == [2]
+    assert [row_number for row_number, _ in errors] == [1, 3, 4, 5]
+    assert 'venue 1 is already booked' in errors[0][1]
+    assert 'booked twice' in errors[1][1]
+    assert 'artist 3 does not exist' in errors[2][1]
+    assert db.session.query(Show).count() == 2
@@ -0,0 +1,46 @@
+from models import Venue, Artist
+from queries import search_results, show_search
+from search import TrigramIndex
+
+NAMES = [(1, 'The Blue Room'), (2, 'Bluegrass Barn'), (3, 'Blue'), (4, 'True Blues'), (5, None), (6, 'Red Door')]
+
+
+def test_trigram_index_matches_like_substrings():
+    index = TrigramIndex()
+    for ref_id, name in NAMES:
+        index.add(ref_id, name)
+    assert sorted(index.search('blue')) == [1, 2, 3, 4]
+    assert sorted(index.search('UE R')) == [1]
+    assert sorted(index.search('lu')) == [1, 2, 3, 4]
+    assert sorted(index.search('')) == [1, 2, 3, 4, 6]
+    assert index.search('green') == []
+    assert index.search('blue barn') == []
+    index.add(2, 'Green Barn')
+    assert sorted(index.search('blue')) == [1, 3, 4]
+    assert index.search('green') == [2]
+
+
+def test_search_results_are_ranked(db):
+    db.session.add_all(Venue(id=ref_id, name=name) for ref_id, name in NAMES)
+    db.session.commit()
+    assert db.engine.dialect.name == 'sqlite'
+    results = search_results(Venue, ' Blue ')
+    assert results['count'] == 4
+    assert [row['name'] for row in results['data']] == ['Blue', 'Bluegrass Barn', 'The Blue Room', 'True Blues']
+    assert search_results(Venue, 'purple')['count'] == 0
+
+
+def test_search_sees_changes(db):
+    db.session.add_all([Artist(id=1, name='Static Echo'), Venue(id=1, name='Hall')])
+    db.session.commit()
+    assert search_results(Artist, 'echo')['count'] == 1
+
+    db.session.get(Artist, 1).name = 'Static Drift'
+    db.session.add(Artist(id=2, name='Echo Lantern'))
+    db.session.commit()
+    assert [row['name'] for row in search_results(Artist, 'echo')['data']] == ['Echo Lantern']
+
+    db.session.delete(db.session.get(Artist, 2))
+    db.session.commit()
+    assert search_results(Artist, 'echo')['count'] == 0
+    assert show_search('artist', 'drift') == {'count': 0, 'data': []}
@@ -0,0 +1,10 @@
+from app import create_app
+
+#----------------------------------------------------------------------------#
+# WSGI entry point.
+#----------------------------------------------------------------------------#
+# The application instance for servers and the flask command
+# (`gunicorn wsgi:app`, FLASK_APP=wsgi). app.py itself only defines
+# create_app(), so importing it doesn't build an app or open a connection.
+
+app = create_app()